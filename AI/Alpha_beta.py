@@ -1,110 +1,77 @@
-
-
-import copy
 import os
-import sys
 # import pygame
 import random
-import numpy as np
-import psutil
 # import time
 from constants import *
+from transposition import TranspositionTable, DEFAULT_BYTES, EXACT, LOWER, UPPER
+from bitboard import Board
+from ordering import MoveOrdering, FEATURES
+from canonical import get_symmetry
+from search import Budget, Searcher, horizon, iterative_deepening
+from stats import SearchStats
 
 # --- PYGAME SETUP ---
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('TIC TAC TOE AI')
-screen.fill(BG_COLOR)
+# the window is only made when the game starts, so the AI can be imported without pygame or a display
+pygame = screen = None
+
+
+def init_screen():
+    global pygame, screen
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('TIC TAC TOE AI')
+    screen.fill(BG_COLOR)
 
 # ----------------Game Instructions-------------------
 # ---------press 'g' to change gamemode (pvp or ai)---------
 # --------- press '0' to change ai level to 0 (random)-----
 # ---------press '1' to change ai level to 1 (MINMAX Algorithm)-----
 # ---------press '2' to change ai level to 2 (ALPHA-BETA Algorithm)-----
+# ---------press '3' to change ai level to 3 (PRINCIPAL VARIATION SEARCH)-----
+# ---------press '4' to change ai level to 4 (MTD(f), null window searches only)-----
+# ---------press '5' to change ai level to 5 (root moves searched by several processes)-----
+# ---------press '6' to change ai level to 6 (Lazy SMP, processes sharing one table)-----
+# ---------press '7' to change ai level to 7 (Monte Carlo Tree Search, for big boards)-----
 # -----------press 'r' to restart the game ------
 
 # --- CLASSES ---
 
-class Board:
-
-    def __init__(self):
-        self.squares = np.zeros((ROW, COL))
-        self.empty_sqrs = self.squares  # [squares]
-        self.marked_sqrs = 0
-
-    def final_state(self, show=False):
-        # return 0 if no win, return 1 if player 1 is win, return 2 if player 2 is win
-
-        # vertical wins
-        for col in range(COL):
-            if self.squares[0][col] == self.squares[1][col] == self.squares[2][col] != 0:
-                if show:
-                    color = CIR_COLOR if self.squares[0][col] == 2 else CROSS_COLOR
-                    iPos = (col * SQSIZE + SQSIZE // 2, 20)
-                    fPos = (col * SQSIZE + SQSIZE // 2, HEIGHT - 20)
-                    pygame.draw.line(screen, color, iPos, fPos, LINE_WIDTH)
-                return self.squares[0][col]
-
-        # horizontal wins
-        for row in range(ROW):
-            if self.squares[row][0] == self.squares[row][1] == self.squares[row][2] != 0:
-                if show:
-                    color = CIR_COLOR if self.squares[row][0] == 2 else CROSS_COLOR
-                    iPos = (20, row * SQSIZE + SQSIZE // 2)
-                    fPos = (WIDTH - 20, row * SQSIZE + SQSIZE // 2)
-                    pygame.draw.line(screen, color, iPos, fPos, LINE_WIDTH)
-                return self.squares[row][0]
-
-        # desc diagonal
-        if self.squares[0][0] == self.squares[1][1] == self.squares[2][2] != 0:
-            if show:
-                color = CIR_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                iPos = (20, 20)
-                fPos = (WIDTH - 20, HEIGHT - 20)
-                pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-
-        # asc diagonal
-        if self.squares[2][0] == self.squares[1][1] == self.squares[0][2] != 0:
-            if show:
-                color = CIR_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                iPos = (20, HEIGHT - 20)
-                fPos = (WIDTH - 20, 20)
-                pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-
-        # no win yet
-        return 0
-
-    def mark_sqr(self, row, col, player):
-        self.squares[row][col] = player
-        self.marked_sqrs += 1
-
-    def empty_sqr(self, row, col):
-        return self.squares[row][col] == 0
-
-    def get_empty_sqrs(self):
-        empty_sqrs = []
-        for row in range(ROW):
-            for col in range(COL):
-                if self.empty_sqr(row, col):
-                    empty_sqrs.append((row, col))
-
-        return empty_sqrs
-
-    def isfull(self):
-        return self.marked_sqrs == 9
-
-    def isempty(self):
-        return self.marked_sqrs == 0
-
 class AI:
 
-    def __init__(self, level=1, player=2):
+    def __init__(self, level=1, player=2, tt_bytes=DEFAULT_BYTES, tt_policy='depth', symmetry_moves='root',
+                 ordering=FEATURES, time_limit=MOVE_TIME, node_limit=None, aspiration=0.25, workers=None,
+                 playouts=None, stats=False):
         self.level = level
         self.player = player
         self.nodes_expanded = 0
+        self.tt_bytes = tt_bytes
+        self.tt = TranspositionTable(tt_bytes, tt_policy)  # kept between moves, the values do not depend on the root
+        self.ordering = MoveOrdering(ordering)  # which move ordering heuristics to use, see ordering.py
+        # stats=True keeps a SearchStats of every search of levels 1-7 and prints it, see stats.py
+        self.stats = SearchStats() if stats else None
+        # where symmetric moves are skipped: 'root', 'all' (every node) or None
+        self.symmetry_moves = symmetry_moves
+        self.symmetry = None
+        self.root_marks = 0
+        # budget of one move (seconds and/or nodes), None for both searches to the end of the game
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.aspiration = aspiration  # half width of the window around the previous depth's score
+        self.budget = None
+        # levels 3 and 4: negamax PVS / MTD(f), scores are integers so they have their own table
+        self.searcher = Searcher(TranspositionTable(tt_bytes, tt_policy), MoveOrdering(ordering), stats=self.stats)
+        # level 5: root splitting over a pool of worker processes (None: one per core), time and node limits,
+        # the nodes are split between the workers
+        self.parallel = None  # made on the first move that uses it, like Lazy SMP below
+        # level 6: Lazy SMP, the shared table is made on the first move that uses it
+        self.workers = workers
+        self.lazy_smp = None
+        # level 7: monte carlo tree search with time_limit and/or this many random games per move
+        # made on the first move that uses it, it needs NumPy
+        self.playouts = playouts
+        self.mcts = None
 
     # --- RANDOM ---
 
@@ -115,9 +82,23 @@ class AI:
 
         return empty_sqrs[idx]  # return an empty square in the position of index (some row and some columns)
 
+    # --- MOVE GENERATION ---
+
+    # symmetric moves lead to the same score, so only one of each group is searched
+    def get_moves(self, board):
+        if self.symmetry_moves == 'all' or (self.symmetry_moves == 'root' and board.marked_sqrs == self.root_marks):
+            return self.symmetry.unique_moves(board)
+        return board.get_empty_sqrs()
+
     # --- MINIMAX with ALPHA-BETA PRUNING ---
 
-    def minimax_alpha_beta(self, board, maximizing, alpha, beta):
+    # depth: how many moves to look ahead, None to search to the end of the game
+    def minimax_alpha_beta(self, board, maximizing, alpha, beta, depth=None):
+        # every call is one node
+        self.nodes_expanded += 1
+        if self.stats is not None:
+            self.stats.node(board)
+
         # terminal case
         case = board.final_state()
 
@@ -133,43 +114,84 @@ class AI:
         elif board.isfull():
             return 0, None
 
+        left = board.cells - board.marked_sqrs
+        if depth is None or depth > left:
+            depth = left
+        if self.budget is not None:
+            self.budget.check(self.nodes_expanded)
+
+        # transposition table: a position seen before gives back its stored score or bound
+        alpha_orig, beta_orig = alpha, beta
+        entry = self.tt.probe(board.hash)
+        tt_move = None
+        if entry is not None:
+            tt_eval, flag, tt_depth, tt_move = entry
+            if tt_depth >= depth:
+                # a bound only ends the search when it is already outside the window
+                if flag == EXACT or (flag == LOWER and tt_eval >= beta) or (flag == UPPER and tt_eval <= alpha):
+                    return tt_eval, tt_move
+
+        # depth limit reached: guess the score from the open lines
+        if depth == 0:
+            if self.stats is not None:
+                self.stats.leaf()
+            return horizon(board), None
+
         if maximizing:
             max_eval = -100
             best_move = None
-            empty_sqrs = board.get_empty_sqrs()
+            empty_sqrs = self.ordering.order(board, self.get_moves(board), 1, tt_move)
 
-            for (row, col) in empty_sqrs:
-                self.nodes_expanded += 1
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, 1)
-                eval = self.minimax_alpha_beta(temp_board, False, alpha, beta)[0]
+            for child, (row, col) in enumerate(empty_sqrs):
+                board.push(row, col, 1)
+                eval = self.minimax_alpha_beta(board, False, alpha, beta, depth - 1)[0]
+                board.pop()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = (row, col)
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, (row, col), 1, depth, child)
+                    if self.stats is not None:
+                        self.stats.cutoff(child)
                     break
 
-            return max_eval, best_move
+            eval = max_eval
 
         elif not maximizing:
             min_eval = 100
             best_move = None
-            empty_sqrs = board.get_empty_sqrs()
-            self.nodes_expanded += 1
+            empty_sqrs = self.ordering.order(board, self.get_moves(board), self.player, tt_move)
 
-            for (row, col) in empty_sqrs:
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, self.player)
-                eval = self.minimax_alpha_beta(temp_board, True, alpha, beta)[0]
+            for child, (row, col) in enumerate(empty_sqrs):
+                board.push(row, col, self.player)
+                eval = self.minimax_alpha_beta(board, True, alpha, beta, depth - 1)[0]
+                board.pop()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = (row, col)
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, (row, col), self.player, depth, child)
+                    if self.stats is not None:
+                        self.stats.cutoff(child)
                     break
 
-            return min_eval, best_move
+            eval = min_eval
+
+        if self.stats is not None:
+            self.stats.interior(child + 1)
+
+        # store how far the result can be trusted
+        if eval <= alpha_orig:
+            flag = UPPER
+        elif eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(board.hash, eval, flag, depth, best_move)
+
+        return eval, best_move
 
     # --- MAIN FUNCTION OF AI CLASS  ---
 
@@ -180,18 +202,95 @@ class AI:
             # random choice
             eval = 'random'
             move = self.rnd(main_board)
+        elif self.level in (3, 4):
+            # principal variation search or MTD(f), the score is for the AI (the player to move)
+            budget = None
+            if self.time_limit is not None or self.node_limit is not None:
+                budget = Budget(self.time_limit, self.node_limit)
+            nodes, passes = self.searcher.nodes, self.searcher.passes
+            eval, move, depth = self.searcher.best_move(main_board, budget, mtdf=self.level == 4)
+            self.nodes_expanded += self.searcher.nodes - nodes
+            print(f'searched {depth} moves deep')
+            if self.level == 4:
+                print(f'MTD(f) passes: {self.searcher.passes - passes} nodes: {self.searcher.nodes - nodes}')
+        elif self.level == 5:
+            # the pool is started on the first move and kept for the rest of the game
+            if self.parallel is None:
+                from parallel import ParallelSearcher
+                self.parallel = ParallelSearcher(self.workers, self.tt_bytes, self.ordering.features, self.stats)
+            nodes = self.parallel.nodes
+            eval, move, depth = self.parallel.best_move(main_board, self.time_limit, self.node_limit)
+            self.nodes_expanded += self.parallel.nodes - nodes
+            print(f'searched {depth} moves deep with {self.parallel.workers} workers')
+        elif self.level == 6:
+            if self.lazy_smp is None:
+                from lazysmp import LazySMP
+                self.lazy_smp = LazySMP(self.workers, self.tt_bytes, self.ordering.features, self.stats)
+            nodes = self.lazy_smp.nodes
+            eval, move, depth = self.lazy_smp.best_move(main_board, self.time_limit, self.node_limit)
+            self.nodes_expanded += self.lazy_smp.nodes - nodes
+            print(f'searched {depth} moves deep')
+        elif self.level == 7:
+            # the tree is kept for the next move of the same game, eval is the win rate of the move
+            if self.mcts is None:
+                from mcts import MCTS
+                self.mcts = MCTS(stats=self.stats)
+            playouts = self.mcts.playouts
+            eval, move = self.mcts.best_move(main_board, self.time_limit, self.playouts)
+            self.nodes_expanded += self.mcts.playouts - playouts
         else:
             # minimax algorithm choice with alpha-beta pruning
-            eval, move = self.minimax_alpha_beta(main_board, False, -float('inf'), float('inf'))
+            self.ordering.new_search()
+            self.symmetry = get_symmetry(main_board.cols, main_board.rows)
+            self.root_marks = main_board.marked_sqrs
+            if self.stats is not None:
+                self.stats.start(main_board, self.tt)
+            if self.time_limit is None and self.node_limit is None:
+                eval, move = self.minimax_alpha_beta(main_board, False, -float('inf'), float('inf'))
+            else:
+                # iterative deepening, answers with the move of the deepest search that fits in the budget
+                self.budget = Budget(self.time_limit, self.node_limit)
+                self.budget.start(self.nodes_expanded)
+                eval, move, depth = iterative_deepening(
+                    lambda depth, alpha, beta: self.minimax_alpha_beta(main_board, False, alpha, beta, depth),
+                    main_board, self.budget, self.aspiration, stats=self.stats)
+                self.budget = None
+                print(f'searched {depth} moves deep')
+            if self.stats is not None:
+                self.stats.finish()
 
         print(f'AI has chosen to mark the square in pos {move} with an eval of: {eval}')
+        if self.level in (3, 4):
+            print(self.searcher.tt)
+            print(self.searcher.ordering)
+            print(self.searcher)
+        elif self.level == 6:
+            print(self.lazy_smp)
+        elif self.level == 7:
+            print(self.mcts)
+        elif self.level not in (0, 5):
+            print(self.tt)
+            print(self.ordering)
+        if self.stats is not None and self.level != 0:
+            print(self.stats)
         return move  # row, col
 
+    # the worker processes of level 5 and the pool and shared memory table of level 6 stay until they
+    # are closed, main() closes them when a game ends and the next move that needs them makes them again
+    def close(self):
+        if self.parallel is not None:
+            self.parallel.close()
+            self.parallel = None
+        if self.lazy_smp is not None:
+            self.lazy_smp.close()
+            self.lazy_smp = None
+
 # Game class
 class Game:
-    def __init__(self):
-        self.board = Board()
-        self.ai = AI()
+    # ai: an AI made by the caller (main.py keeps one per game, so its tables stay warm between games)
+    def __init__(self, ai=None):
+        self.board = Board(ROW, COL, WIN_LEN)
+        self.ai = ai if ai is not None else AI()
         self.player = 1
         self.gamemode = 'ai'
         self.running = True
@@ -212,7 +311,7 @@ class Game:
         return self.board.final_state(show=True) != 0 or self.board.isfull()
 
     def reset(self):
-        self.__init__()
+        self.__init__(self.ai)
 
     def draw_fig(self, row, col):
         if self.player == 1:
@@ -236,17 +335,22 @@ class Game:
         screen.fill(BG_COLOR)
 
         # vertical
-        pygame.draw.line(screen, LINE_COLOR, (SQSIZE, 0), (SQSIZE, HEIGHT), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (WIDTH - SQSIZE, 0), (WIDTH - SQSIZE, HEIGHT), LINE_WIDTH)
+        for col in range(1, COL):
+            pygame.draw.line(screen, LINE_COLOR, (col * SQSIZE, 0), (col * SQSIZE, HEIGHT), LINE_WIDTH)
 
         # horizontal
-        pygame.draw.line(screen, LINE_COLOR, (0, SQSIZE), (WIDTH, SQSIZE), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (0, HEIGHT - SQSIZE), (WIDTH, HEIGHT - SQSIZE), LINE_WIDTH)
+        for row in range(1, ROW):
+            pygame.draw.line(screen, LINE_COLOR, (0, row * SQSIZE), (WIDTH, row * SQSIZE), LINE_WIDTH)
 
 # ... (the rest of your main function code)
 import time
 
-def main():
+# keep_ai: the AI of every game, kept by main.py; closing the window returns so the game can be
+# started again from there
+def main(keep_ai=None):
+    init_screen()
+    import psutil  # only the game window reports the memory of the process
+
     total_nodes_expanded = 0
     total_time_elapsed = 0
     total_memory_used = 0
@@ -255,65 +359,80 @@ def main():
 
     for _ in range(num_rounds):
         # --- OBJECTS ---
-        game = Game()
+        game = Game(keep_ai)
         board = game.board
         ai = game.ai
 
         # --- GAME LOOP ---
-        start_time = time.time()
-        while not game.isover():
-            for event in pygame.event.get():
-                if event.type == pygame.QUIT:
-                    pygame.quit()
-                    sys.exit()
+        ai_time = 0
+        try:
+            while not game.isover():
+                for event in pygame.event.get():
+                    if event.type == pygame.QUIT:
+                        pygame.quit()
+                        return
+
+                    if event.type == pygame.KEYDOWN:
+                        if event.key == pygame.K_g:
+                            game.change_gamemode()
+
+                        if event.key == pygame.K_r:
+                            game.reset()
+                            board = game.board
+                            ai = game.ai
+
+                        if event.key == pygame.K_0:
+                            ai.level = 0
 
-                if event.type == pygame.KEYDOWN:
-                    if event.key == pygame.K_g:
-                        game.change_gamemode()
+                        if event.key == pygame.K_1:
+                            ai.level = 1
 
-                    if event.key == pygame.K_r:
-                        game.reset()
-                        board = game.board
-                        ai = game.ai
+                        if event.key == pygame.K_2:
+                            ai.level = 2
 
-                    if event.key == pygame.K_0:
-                        ai.level = 0
+                        if event.key == pygame.K_3:
+                            ai.level = 3
 
-                    if event.key == pygame.K_1:
-                        ai.level = 1
+                        if event.key == pygame.K_4:
+                            ai.level = 4
 
-                    if event.key == pygame.K_2:
-                        ai.level = 2
+                        if event.key == pygame.K_5:
+                            ai.level = 5
 
-                if event.type == pygame.MOUSEBUTTONDOWN:
-                    pos = event.pos
-                    row = pos[1] // SQSIZE
-                    col = pos[0] // SQSIZE
+                        if event.key == pygame.K_6:
+                            ai.level = 6
 
-                    if board.empty_sqr(row, col) and game.running:
-                        game.make_move(row, col)
+                        if event.key == pygame.K_7:
+                            ai.level = 7
 
-                        if game.isover():
-                            game.running = False
+                    if event.type == pygame.MOUSEBUTTONDOWN:
+                        pos = event.pos
+                        row = pos[1] // SQSIZE
+                        col = pos[0] // SQSIZE
 
-            if game.gamemode == 'ai' and game.player == ai.player and game.running:
-                row, col = game.ai.eval(game.board)
-                game.make_move(row, col)
+                        if board.empty_sqr(row, col) and game.running:
+                            game.make_move(row, col)
 
-                if game.isover():
-                    game.running = False
+                            if game.isover():
+                                game.running = False
 
-                print(f"Nodes Expanded: {ai.nodes_expanded}")
+                if game.gamemode == 'ai' and game.player == ai.player and game.running:
+                    start_time = time.perf_counter()
+                    row, col = game.ai.eval(game.board)
+                    ai_time += time.perf_counter() - start_time
+                    game.make_move(row, col)
 
-            pygame.display.update()
-        start_time = time.time()
+                    if game.isover():
+                        game.running = False
 
-        # Simulate some time-consuming operations
-        for _ in range(1000000):
-            _ = 2 * 2
+                    print(f"Nodes Expanded: {ai.nodes_expanded}")
 
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+                pygame.display.update()
+        finally:
+            # frees the worker processes and shared memory of levels 5 and 6, also when the window is closed
+            ai.close()
+        # time the AI spent choosing its moves this round
+        elapsed_time = ai_time
 
         print(f"Elapsed Time: {elapsed_time} seconds")
         memory_used = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024  # in MB
@@ -347,6 +466,7 @@ def main():
     print(f"Average Memory Used: {avg_memory_used} MB")
 
     pygame.quit()
-    sys.exit()
 
-main()
+# worker processes of level 5 import this file again, they must not start a game
+if __name__ == "__main__":
+    main()
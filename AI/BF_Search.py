@@ -1,9 +1,17 @@
-import tkinter as tk
 import random
-from tkinter import messagebox
 import time
 
-import psutil
+# the window needs tkinter and psutil, they are imported when it is made so bfs_move works without them
+tk = messagebox = psutil = None
+
+
+def init_ui():
+    global tk, messagebox, psutil
+    import tkinter as tk
+    from tkinter import messagebox
+    import psutil
+
+
 #
 # def time_profile_example():
 #     start_time = time.time()
@@ -109,6 +117,7 @@ class TicTacToeGUI:
         self.search_space_Sum=[0]
         self.game_count=[0]
         self.total_elapsed_time = [0]
+        self.ai_time = [0]
         self.total_memory=[0]
 
         for i in range(3):
@@ -140,14 +149,9 @@ class TicTacToeGUI:
         average_memory = self.total_memory[0] / self.game_count[0]
         print(f"Average memory {average_memory:.2f} MB")
         self.search_space_counter[0] = 0
-        start_time = time.time()
-
-        # Simulate some time-consuming operations
-        for _ in range(1000000):
-            _ = 2 * 2
-
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+        # time the computer spent in bfs_move this game
+        elapsed_time = self.ai_time[0]
+        self.ai_time[0] = 0
         self.total_elapsed_time[0] += elapsed_time
         average_time = self.total_elapsed_time[0] / self.game_count[0]
         print(f"Elapsed Time: {elapsed_time} seconds")
@@ -193,14 +197,9 @@ class TicTacToeGUI:
                 average_memory = self.total_memory[0] / self.game_count[0]
                 print(f"Average memory {average_memory:.2f} MB")
 
-                start_time = time.time()
-
-                # Simulate some time-consuming operations
-                for _ in range(1000000):
-                    _ = 2 * 2
-
-                end_time = time.time()
-                elapsed_time = end_time - start_time
+                # time the computer spent in bfs_move this game
+                elapsed_time = self.ai_time[0]
+                self.ai_time[0] = 0
                 self.total_elapsed_time[0]+=elapsed_time
                 average_time= self.total_elapsed_time[0]/self.game_count[0]
                 print(f"Elapsed Time: {elapsed_time} seconds")
@@ -217,7 +216,9 @@ class TicTacToeGUI:
             # If it's the first move of the game, choose a random corner position
             row, col = random.choice([(0, 0), (0, 2), (2, 0), (2, 2)])
         else:
+            start_time = time.perf_counter()
             row, col = bfs_move(self.board, self.current_player,self.search_space_counter)
+            self.ai_time[0] += time.perf_counter() - start_time
         self.make_move(row, col)
 
     def end_game(self):
@@ -231,6 +232,7 @@ class TicTacToeGUI:
 # Get memory usage of the Python process
 
 if __name__ == "__main__":
+    init_ui()
     root = tk.Tk()
     app = TicTacToeGUI(root)
     root.mainloop()
\ No newline at end of file
@@ -1,21 +1,15 @@
-
-
-import tkinter as tk
 import random
-from tkinter import messagebox
 import time
 
-def time_profile_example():
-    start_time = time.time()
+# the window needs tkinter, it is imported when the window is made so find_best_move works without it
+tk = messagebox = None
 
-    # Simulate some time-consuming operations
-    for _ in range(1000000):
-        _ = 2 * 2
 
-    end_time = time.time()
-    elapsed_time = end_time - start_time
+def init_ui():
+    global tk, messagebox
+    import tkinter as tk
+    from tkinter import messagebox
 
-    print(f"Elapsed Time: {elapsed_time} seconds")
 
 def print_board(board):
     for row in board:
@@ -38,8 +32,11 @@ def check_draw(board):
 def get_empty_positions(board):
     return [(i, j) for i in range(3) for j in range(3) if board[i][j] == ' ']
 
-def minimax(board, depth, maximizing_player, alpha, beta, player, counter):
+def minimax(board, depth, maximizing_player, alpha, beta, player, counter, stats=None):
     counter[0] += 1  # Increment the search space counter
+    if stats is not None:
+        # find_best_move gives its moves depth 2, the depth counts down and does not stop the search
+        stats.visit(3 - depth, check_winner(board, 'X') or check_winner(board, 'O') or check_draw(board))
 
     if check_winner(board, 'X'):
         return -1
@@ -50,42 +47,58 @@ def minimax(board, depth, maximizing_player, alpha, beta, player, counter):
 
     if maximizing_player:
         max_eval = float('-inf')
-        for move in get_empty_positions(board):
+        for child, move in enumerate(get_empty_positions(board)):
             i, j = move
             board[i][j] = player
-            eval = minimax(board, depth - 1, False, alpha, beta, 'X' if player == 'O' else 'O', counter)
+            eval = minimax(board, depth - 1, False, alpha, beta, 'X' if player == 'O' else 'O', counter, stats)
             board[i][j] = ' '
             max_eval = max(max_eval, eval)
             alpha = max(alpha, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(child)
                 break
+        if stats is not None:
+            stats.interior(child + 1)
         return max_eval
     else:
         min_eval = float('inf')
-        for move in get_empty_positions(board):
+        for child, move in enumerate(get_empty_positions(board)):
             i, j = move
             board[i][j] = player
-            eval = minimax(board, depth - 1, True, alpha, beta, 'X' if player == 'O' else 'O', counter)
+            eval = minimax(board, depth - 1, True, alpha, beta, 'X' if player == 'O' else 'O', counter, stats)
             board[i][j] = ' '
             min_eval = min(min_eval, eval)
             beta = min(beta, eval)
             if beta <= alpha:
+                if stats is not None:
+                    stats.cutoff(child)
                 break
+        if stats is not None:
+            stats.interior(child + 1)
         return min_eval
 
-def find_best_move(board, player, counter):
+# stats: a stats.SearchStats to fill with this search, None to not keep one
+def find_best_move(board, player, counter, stats=None):
     best_val = float('-inf')
     best_move = None
 
-    for move in get_empty_positions(board):
+    if stats is not None:
+        stats.start()
+        stats.visit(0, False)
+    moves = get_empty_positions(board)
+    for move in moves:
         i, j = move
         board[i][j] = player
-        move_val = minimax(board, 2, False, float('-inf'), float('inf'), 'X' if player == 'O' else 'O', counter)
+        move_val = minimax(board, 2, False, float('-inf'), float('inf'), 'X' if player == 'O' else 'O', counter, stats)
         board[i][j] = ' '
 
         if move_val > best_val:
             best_move = move
             best_val = move_val
+    if stats is not None:
+        stats.interior(len(moves))
+        stats.finish()
 
     return best_move
 
@@ -101,6 +114,7 @@ class TicTacToeGUI:
         self.buttons = {}  # Store buttons in a dictionary
 
         self.search_space_counter = [0]  # Counter for the search space
+        self.ai_time = [0]  # time the computer spent in find_best_move this game
         self.root.bind('r', lambda event: self.restart_game())
         for i in range(3):
             for j in range(3):
@@ -152,7 +166,9 @@ class TicTacToeGUI:
             # If it's the first move of the game, choose a random corner position
             row, col = random.choice([(0, 0), (0, 2), (2, 0), (2, 2)])
         else:
+            start_time = time.perf_counter()
             row, col = find_best_move(self.board, self.current_player, self.search_space_counter)
+            self.ai_time[0] += time.perf_counter() - start_time
         self.make_move(row, col)
 
     def end_game(self):
@@ -160,7 +176,11 @@ class TicTacToeGUI:
             for j in range(3):
                 self.buttons[(i, j)].config(state='disabled')
 
+        print(f"Elapsed Time: {self.ai_time[0]} seconds")
+        self.ai_time[0] = 0
+
 if __name__ == "__main__":
+    init_ui()
     root = tk.Tk()
     app = TicTacToeGUI(root)
     root.mainloop()
@@ -0,0 +1,45 @@
+# final_state for many boards at once, without Board objects
+# positions are an (N, rows*cols) int8 array (0 empty, 1 player 1, 2 player 2, row-major squares)
+# every line is one column of the incidence matrix, so one matrix product sums all lines of all
+# boards: player 1 marks count 1 and player 2 marks count k + 1, so a line sums to k only when
+# player 1 has all of it and to k * (k + 1) only when player 2 has all of it
+#
+# result per board: ONGOING (0), 1 or 2 for the winner, DRAW (3) for a full board without a line
+# (a board where both players have a line can not happen in a game, it reports player 1)
+
+from functools import lru_cache
+
+import numpy as np
+
+from rules import get_rules
+
+ONGOING, DRAW = 0, 3
+CHUNK = 1 << 18  # boards per matrix product, bounds the temporary arrays
+
+
+@lru_cache(maxsize=None)
+def incidence(rows=3, cols=3, k=3):
+    # (cells, lines) float32 matrix with a 1 where the square is on the line
+    rules = get_rules(cols, rows, k)
+    matrix = np.zeros((rules.cells, len(rules.lines)), dtype=np.float32)
+    for i, line in enumerate(rules.lines):
+        matrix[list(line), i] = 1
+    return matrix
+
+
+def final_states(positions, rows=3, cols=3, k=3):
+    positions = np.asarray(positions, dtype=np.int8)
+    if positions.ndim != 2 or positions.shape[1] != rows * cols:
+        raise ValueError(f"positions must be an (N, {rows * cols}) array, got {positions.shape}")
+
+    matrix = incidence(rows, cols, k)
+    weights = np.array([0, 1, k + 1], dtype=np.float32)
+    states = np.empty(len(positions), dtype=np.int8)
+    for start in range(0, len(positions), CHUNK):
+        chunk = positions[start:start + CHUNK]
+        sums = weights[chunk] @ matrix
+        x_win = (sums == k).any(axis=1)
+        o_win = (sums == k * (k + 1)).any(axis=1)
+        full = (chunk != 0).all(axis=1)
+        states[start:start + CHUNK] = np.where(x_win, 1, np.where(o_win, 2, np.where(full, DRAW, ONGOING)))
+    return states
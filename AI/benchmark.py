@@ -0,0 +1,586 @@
+# benchmarks for the AI engines, run from the AI folder:
+#   python benchmark.py board      -> bitboard Board (copying and push/pop) against the old NumPy grid Board
+#   python benchmark.py symmetry   -> distinct positions per ply with and without symmetry reduction
+#   python benchmark.py pvs        -> nodes of Principal Variation Search against plain alpha-beta
+#   python benchmark.py mtdf       -> nodes and passes of MTD(f) against PVS
+#   python benchmark.py parallel   -> root splitting speedup for 1..N worker processes
+#   python benchmark.py lazysmp    -> Lazy SMP speedup and shared table hit rate for 1..N worker processes
+#   python benchmark.py batch      -> batch.final_states against one Board per position
+#   python benchmark.py engines    -> latency, nodes/s and peak memory of every engine's move on a fixed
+#                                     set of 3x3 and 5x5 positions (--out / --baseline to compare releases)
+#   python benchmark.py startup    -> import time of every engine module in a new interpreter, and whether
+#                                     it loaded pygame, tkinter or psutil
+#   python benchmark.py serve      -> bursts of move requests from many games in their first moves, through
+#                                     the move server's cache and straight to its worker pool
+
+import argparse
+import contextlib
+import copy
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+
+from batch import final_states, incidence
+from bitboard import Board
+from canonical import get_symmetry
+from engines import ENGINES, make_engine
+from lazysmp import LazySMP
+from parallel import ParallelSearcher
+from search import Searcher
+
+
+# --- OLD NUMPY BOARD (reference for the board benchmark) ---
+
+class GridBoard:
+    # the float64 grid Board the AIs used before bitboard.py (drawing removed)
+
+    def __init__(self, rows=3, cols=3):
+        self.rows = rows
+        self.cols = cols
+        self.squares = np.zeros((rows, cols))
+        self.marked_sqrs = 0
+
+    def final_state(self, show=False):
+        for col in range(self.cols):
+            if self.squares[0][col] == self.squares[1][col] == self.squares[2][col] != 0:
+                return self.squares[0][col]
+        for row in range(self.rows):
+            if self.squares[row][0] == self.squares[row][1] == self.squares[row][2] != 0:
+                return self.squares[row][0]
+        if self.squares[0][0] == self.squares[1][1] == self.squares[2][2] != 0:
+            return self.squares[1][1]
+        if self.squares[2][0] == self.squares[1][1] == self.squares[0][2] != 0:
+            return self.squares[1][1]
+        return 0
+
+    def mark_sqr(self, row, col, player):
+        self.squares[row][col] = player
+        self.marked_sqrs += 1
+
+    def empty_sqr(self, row, col):
+        return self.squares[row][col] == 0
+
+    def get_empty_sqrs(self):
+        empty_sqrs = []
+        for row in range(self.rows):
+            for col in range(self.cols):
+                if self.empty_sqr(row, col):
+                    empty_sqrs.append((row, col))
+        return empty_sqrs
+
+    def isfull(self):
+        return self.marked_sqrs == self.rows * self.cols
+
+
+# --- HELPERS ---
+
+def minimax(board, maximizing, counter):
+    # the copying search AI.minimax used before push/pop, works with any board
+    case = board.final_state()
+    if case == 1:
+        return 1
+    if case == 2:
+        return -1
+    elif board.isfull():
+        return 0
+
+    best = -100 if maximizing else 100
+    for (row, col) in board.get_empty_sqrs():
+        counter[0] += 1
+        temp_board = copy.deepcopy(board)
+        temp_board.mark_sqr(row, col, 1 if maximizing else 2)
+        eval = minimax(temp_board, not maximizing, counter)
+        best = max(best, eval) if maximizing else min(best, eval)
+    return best
+
+
+def minimax_push(board, maximizing, counter):
+    # same search marking and undoing in place, like AI.minimax does now
+    case = board.final_state()
+    if case == 1:
+        return 1
+    if case == 2:
+        return -1
+    elif board.isfull():
+        return 0
+
+    best = -100 if maximizing else 100
+    for (row, col) in board.get_empty_sqrs():
+        counter[0] += 1
+        board.push(row, col, 1 if maximizing else 2)
+        eval = minimax_push(board, not maximizing, counter)
+        board.pop()
+        best = max(best, eval) if maximizing else min(best, eval)
+    return best
+
+
+def setup(board, moves):
+    for i, (row, col) in enumerate(moves):
+        board.mark_sqr(row, col, i % 2 + 1)
+    return board
+
+
+def timed(fn):
+    start = time.perf_counter()
+    result = fn()
+    return result, time.perf_counter() - start
+
+
+# --- ENGINE SUITE ---
+
+# engines of every board, the 5x5 searches get a node budget so every run does the same work
+SUITE = {
+    (3, 3, 3): {'engines': ['random', 'minimax', 'alphabeta', 'heuristic', 'symmetry', 'distance', 'bfs',
+                            'winning', 'reduction', 'pvs', 'mtdf', 'mcts'],
+                'plies': range(0, 7), 'node_limit': None},
+    (5, 5, 3): {'engines': ['random', 'minimax', 'alphabeta', 'heuristic', 'symmetry', 'distance', 'pvs', 'mtdf',
+                            'mcts'],
+                'plies': range(0, 9, 2), 'node_limit': 5000},
+}
+CORPUS_GAMES = 3
+CORPUS_SEED = 2024
+
+
+def corpus(rows, cols, k, plies, games=CORPUS_GAMES, seed=CORPUS_SEED):
+    # move lists of the positions: random games from a fixed seed, cut after every number of plies
+    # (positions where the game is already over are left out)
+    rng = random.Random(seed)
+    positions = []
+    for _ in range(games):
+        board = Board(rows, cols, k)
+        moves = []
+        for ply in range(max(plies) + 1):
+            if board.final_state() or board.isfull():
+                break
+            if ply in plies and moves not in positions:
+                positions.append(list(moves))
+            row, col = rng.choice(board.get_empty_sqrs())
+            board.push(row, col, ply % 2 + 1)
+            moves.append((row, col))
+    return positions
+
+
+# --- BENCHMARKS ---
+
+def bench_board(args):
+    moves = [(1, 1)]  # one opening move so the grid board finishes in seconds
+    print(f"minimax from {moves} on {args.size}x{args.size}")
+
+    rows = []
+    for name, make, search in (("numpy", GridBoard, minimax),
+                               ("bitboard", Board, minimax),
+                               ("push/pop", Board, minimax_push)):
+        board = setup(make(args.size, args.size), moves)
+        counter = [0]
+        value, seconds = timed(lambda: search(board, len(moves) % 2 == 0, counter))
+        rows.append((name, value, counter[0], seconds))
+
+    for name, value, nodes, seconds in rows:
+        print(f"{name:>10}: eval {value:+d}  nodes {nodes:>8}  {seconds:7.3f}s  {nodes / seconds:10.0f} nodes/s"
+              f"  {rows[0][3] / seconds:5.1f}x")
+
+
+def bench_symmetry(args):
+    board = Board(args.size, args.size)
+    symmetry = get_symmetry(args.size, args.size)
+    positions = [set() for _ in range(args.depth + 1)]
+    canonical = [set() for _ in range(args.depth + 1)]
+
+    def walk(player):
+        ply = board.marked_sqrs
+        if board.hash in positions[ply]:
+            return
+        positions[ply].add(board.hash)
+        canonical[ply].add(symmetry.canonical(board)[0])
+        if ply == args.depth or board.final_state():
+            return
+        for (row, col) in board.get_empty_sqrs():
+            board.push(row, col, player)
+            walk(player % 2 + 1)
+            board.pop()
+
+    _, seconds = timed(lambda: walk(1))
+    print(f"positions per ply on {args.size}x{args.size} ({seconds:.2f}s)")
+    for ply in range(args.depth + 1):
+        print(f"ply {ply}: {len(positions[ply]):>8} positions  {len(canonical[ply]):>8} canonical"
+              f"  {len(positions[ply]) / len(canonical[ply]):4.1f}x smaller")
+
+
+# openings searched by the pvs benchmark: (size, k, moves)
+PVS_POSITIONS = (
+    (4, 3, []),
+    (4, 4, [(1, 1)]),
+    (4, 4, [(1, 1), (2, 2), (1, 2)]),
+    (5, 4, [(2, 2)]),
+    (5, 4, [(2, 2), (1, 1), (1, 2)]),
+    (5, 5, [(2, 2), (1, 2)]),
+)
+
+
+def bench_pvs(args):
+    print(f"negamax to depth {args.depth}, same move ordering and transposition table size for both")
+    for size, k, moves in PVS_POSITIONS:
+        rows = []
+        for pvs in (False, True):
+            board = setup(Board(size, size, k), moves)
+            searcher = Searcher(pvs=pvs)
+            (score, move, depth), seconds = timed(lambda: searcher.best_move(board, max_depth=args.depth))
+            rows.append((searcher, score, move, seconds))
+
+        (ab, ab_score, _, ab_seconds), (pvs, pvs_score, move, pvs_seconds) = rows
+        print(f"{size}x{size} k={k} {str(moves):<26} score {pvs_score:+7d} move {move}  "
+              f"alpha-beta {ab.nodes:>8} nodes {ab_seconds:6.2f}s  "
+              f"PVS {pvs.nodes:>8} nodes {pvs_seconds:6.2f}s ({pvs.researches} re-searches)  "
+              f"{ab.nodes / pvs.nodes:4.2f}x fewer nodes" + ("" if ab_score == pvs_score else "  SCORES DIFFER"))
+
+
+def bench_mtdf(args):
+    print(f"iterative deepening to depth {args.depth}, same move ordering and transposition table size for both")
+    for size, k, moves in PVS_POSITIONS:
+        rows = []
+        for mtdf in (False, True):
+            board = setup(Board(size, size, k), moves)
+            searcher = Searcher()
+            (score, move, depth), seconds = timed(lambda: searcher.best_move(board, max_depth=args.depth, mtdf=mtdf))
+            rows.append((searcher, score, move, seconds))
+
+        (pvs, pvs_score, _, pvs_seconds), (mtdf, mtdf_score, move, mtdf_seconds) = rows
+        print(f"{size}x{size} k={k} {str(moves):<26} score {mtdf_score:+7d} move {move}  "
+              f"PVS {pvs.nodes:>8} nodes {pvs_seconds:6.2f}s  "
+              f"MTD(f) {mtdf.nodes:>8} nodes {mtdf_seconds:6.2f}s ({mtdf.passes} passes)  "
+              f"{pvs.nodes / mtdf.nodes:4.2f}x fewer nodes" + ("" if pvs_score == mtdf_score else "  SCORES DIFFER"))
+
+
+def bench_parallel(args):
+    board = setup(Board(args.size, args.size, args.k), [(args.size // 2, args.size // 2)])
+    print(f"search to depth {args.depth} on {args.size}x{args.size} k={args.k} after the center, "
+          f"{os.cpu_count()} cores")
+
+    # level 3 against level 5: iterative deepening to the same depth must play the same move
+    searcher = Searcher()
+    (score, move, _), seconds = timed(lambda: searcher.best_move(board, max_depth=args.depth))
+    print(f"sequential: score {score:+d} move {move}  nodes {searcher.nodes:>8}  {seconds:7.2f}s")
+
+    base = None
+    for workers in range(1, args.workers + 1):
+        parallel = ParallelSearcher(workers)
+        parallel.start()
+        (p_score, p_move, _), p_seconds = timed(lambda: parallel.best_move(board, max_depth=args.depth))
+        parallel.close()
+        base = base or p_seconds
+        print(f"{workers:>2} workers: score {p_score:+d} move {p_move}  nodes {parallel.nodes:>8}  {p_seconds:7.2f}s"
+              f"  {base / p_seconds:4.2f}x  {seconds / p_seconds:4.2f}x sequential"
+              + ("" if (p_score, p_move) == (score, move) else "  DIFFERENT RESULT"))
+
+
+def bench_lazysmp(args):
+    board = setup(Board(args.size, args.size, args.k), [(args.size // 2, args.size // 2)])
+    print(f"iterative deepening to depth {args.depth} on {args.size}x{args.size} k={args.k} after the center, "
+          f"{os.cpu_count()} cores")
+
+    base = None
+    for workers in range(1, args.workers + 1):
+        smp = LazySMP(workers)
+        smp.start()
+        (score, move, depth), seconds = timed(lambda: smp.best_move(board, max_depth=args.depth))
+        smp.close()
+        base = base or seconds
+        print(f"{workers:>2} workers: score {score:+d} move {move}  nodes {smp.nodes:>8}  {seconds:7.2f}s"
+              f"  {base / seconds:4.2f}x  shared TT hit rate {smp.hit_rate():.1%}")
+
+
+def bench_batch(args):
+    cells = args.size * args.size
+    positions = np.random.default_rng(0).integers(0, 3, (args.boards, cells), dtype=np.int8)
+    # boards where both players have a line can not come from a game, leave them out
+    matrix = incidence(args.size, args.size, args.k)
+    both = (((positions == 1) @ matrix == args.k).any(axis=1) & ((positions == 2) @ matrix == args.k).any(axis=1))
+    positions = positions[~both]
+    states, seconds = timed(lambda: final_states(positions, args.size, args.size, args.k))
+    print(f"{len(positions)} random {args.size}x{args.size} k={args.k} positions")
+    print(f"batch.final_states: {seconds:7.3f}s  {len(positions) / seconds:12.0f} boards/s")
+
+    sample = positions[:len(positions) // 100]
+
+    def one_by_one():
+        result = []
+        for squares in sample.tolist():
+            board = Board(args.size, args.size, args.k)
+            for idx, player in enumerate(squares):
+                if player:
+                    board.push(*divmod(idx, args.size), player)
+            result.append(board.final_state() or (3 if board.isfull() else 0))
+        return result
+
+    result, board_seconds = timed(one_by_one)
+    print(f"Board per position: {board_seconds:7.3f}s  {len(sample) / board_seconds:12.0f} boards/s"
+          f"  ({len(sample)} positions)")
+    same = result == states[:len(sample)].tolist()
+    print(f"{(len(positions) / seconds) / (len(sample) / board_seconds):.0f}x faster"
+          + ("" if same else "  DIFFERENT RESULTS"))
+
+
+def bench_engines(args):
+    baseline = {}
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = {(tuple(row['board']), row['engine']): row for row in json.load(f)}
+
+    def call(name, shape, moves, node_limit):
+        # (seconds, nodes) of one move of a new engine, its output is thrown away
+        board = setup(Board(*shape), moves)
+        random.seed(0)
+        np.random.seed(0)
+        engine = make_engine(name, board, 0, None, node_limit)
+        with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+            _, seconds = timed(lambda: engine.move(board))
+        return seconds, engine.nodes
+
+    results = []
+    for shape, suite in SUITE.items():
+        if args.size is not None and shape[0] != args.size:
+            continue
+        positions = corpus(*shape, suite['plies'])
+        engines = [name for name in suite['engines'] if args.engines is None or name in args.engines]
+        print(f"{shape[0]}x{shape[1]} k={shape[2]}: {len(positions)} positions, {args.warmup} warm-up and "
+              f"{args.repeat} timed runs each" + (f", {suite['node_limit']} nodes per move" if suite['node_limit'] else ""))
+        print(f"{'engine':>10} {'median ms':>10} {'p95 ms':>9} {'nodes/move':>11} {'nodes/s':>10} {'peak KiB':>9}"
+              + (f" {'vs baseline':>12}" if baseline else ""))
+        for name in engines:
+            for _ in range(args.warmup):
+                for moves in positions:
+                    call(name, shape, moves, suite['node_limit'])
+            times, nodes = [], 0
+            for _ in range(args.repeat):
+                for moves in positions:
+                    seconds, move_nodes = call(name, shape, moves, suite['node_limit'])
+                    times.append(seconds)
+                    nodes += move_nodes
+
+            # memory on its own pass, tracing slows the search down too much to time it
+            peak = 0
+            tracemalloc.start()
+            for moves in positions:
+                tracemalloc.reset_peak()
+                call(name, shape, moves, suite['node_limit'])
+                peak = max(peak, tracemalloc.get_traced_memory()[1])
+            tracemalloc.stop()
+
+            row = {'board': list(shape), 'engine': name, 'moves': len(times),
+                   'median_ms': float(np.median(times)) * 1000, 'p95_ms': float(np.percentile(times, 95)) * 1000,
+                   'nodes_per_move': nodes / len(times), 'nodes_per_second': nodes / sum(times),
+                   'peak_kib': peak / 1024}
+            results.append(row)
+            line = (f"{name:>10} {row['median_ms']:10.2f} {row['p95_ms']:9.2f} {row['nodes_per_move']:11.0f} "
+                    f"{row['nodes_per_second']:10.0f} {row['peak_kib']:9.0f}")
+            old = baseline.get((shape, name))
+            if old is not None:
+                line += f" {row['median_ms'] / old['median_ms'] - 1:+12.1%}" if old['median_ms'] else f" {'':>12}"
+            print(line)
+        print()
+
+    if args.out:
+        with open(args.out, 'w') as f:
+            json.dump(results, f, indent=1)
+        print(f"results written to {args.out}")
+
+
+# modules of the engines, the scripts are loaded from their file like engines.load_script does
+STARTUP_MODULES = ['search', 'engines', 'main.py', 'tictactoe.py', 'Alpha_beta.py', 'heuristic.py', 'symmtry.py',
+                   'distance_improve.py', 'BF_Search.py', 'minimax by heuristic fun(winning moves).py',
+                   os.path.join('additional cose', 'heuristic reduction.py')]
+UI_MODULES = ['pygame', 'tkinter', 'psutil']
+
+STARTUP_CODE = '''
+import importlib.util, sys, time
+start = time.perf_counter()
+name = sys.argv[1]
+if name.endswith('.py'):
+    spec = importlib.util.spec_from_file_location('script', name)
+    spec.loader.exec_module(importlib.util.module_from_spec(spec))
+else:
+    __import__(name)
+seconds = time.perf_counter() - start
+print(seconds, ' '.join(module for module in sys.argv[2:] if module in sys.modules))
+'''
+
+
+def bench_startup(args):
+    # a new interpreter for every import, so nothing is cached from the one before
+    # (a module that still opens a window gets the dummy video driver, so it can be timed without a display)
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ, SDL_VIDEODRIVER='dummy', PYGAME_HIDE_SUPPORT_PROMPT='1')
+    print(f"{'module':>45} {'median ms':>10} {'min ms':>8}  UI modules loaded")
+    for module in STARTUP_MODULES:
+        times, loaded = [], ''
+        for _ in range(args.repeat):
+            out = subprocess.run([sys.executable, '-c', STARTUP_CODE, module, *UI_MODULES], cwd=here, env=env,
+                                 capture_output=True, text=True, check=True).stdout.splitlines()[-1]
+            seconds, _, loaded = out.partition(' ')
+            times.append(float(seconds))
+        print(f"{module:>45} {statistics.median(times) * 1000:10.1f} {min(times) * 1000:8.1f}  {loaded or '-'}")
+
+
+def bench_serve(args):
+    # every game: the engine opens as player 1 through the server, player 2 answers with a random move
+    # the engine's moves of all the games are asked at the same time (one burst per ply), like many
+    # games that start together; the same bursts are then searched again without the cache
+    import asyncio
+    from server import MoveServer, listen, play, read_board
+
+    def grid(board):
+        squares = [[0] * board.cols for _ in range(board.rows)]
+        for idx, player in board.stack:
+            row, col = divmod(idx, board.cols)
+            squares[row][col] = player
+        return squares
+
+    def request(board):
+        return {'board': grid(board), 'k': args.k, 'engine': args.engine,
+                'budget': {'move_time': None, 'node_limit': args.node_limit}}
+
+    async def cached(server):
+        rng = random.Random(args.seed)
+        boards = [Board(args.size, args.size, args.k) for _ in range(args.games)]
+        bursts = []
+        start = time.perf_counter()
+        for _ in range(args.moves):
+            bursts.append([request(board) for board in boards])
+            answers = await asyncio.gather(*(server.answer(request) for request in bursts[-1]))
+            for board, answer in zip(boards, answers):
+                board.push(*answer['move'], 1)
+                board.push(*rng.choice(board.get_empty_sqrs()), 2)
+        return bursts, time.perf_counter() - start
+
+    async def connection_closes(server):
+        # a client that sends one request and reads to EOF gets its answer and then EOF, also on the
+        # connection of the first request (a worker forked while it was open would keep it open)
+        listener = await listen(server, '127.0.0.1', 0)
+        reader, writer = await asyncio.open_connection('127.0.0.1', listener.sockets[0].getsockname()[1])
+        writer.write(json.dumps(request(Board(args.size, args.size, args.k))).encode() + b'\n')
+        writer.write_eof()
+        try:
+            lines = (await asyncio.wait_for(reader.read(), 30)).splitlines()
+        except asyncio.TimeoutError:
+            lines = None
+        writer.close()
+        listener.close()
+        await listener.wait_closed()
+        return lines is not None and len(lines) == 1 and 'move' in json.loads(lines[0])
+
+    async def uncached(server, bursts):
+        # what the server did before the cache: every request is one search of its own board
+        loop = asyncio.get_running_loop()
+        start = time.perf_counter()
+        for burst in bursts:
+            boards = [read_board(request)[0] for request in burst]
+            await asyncio.gather(*(loop.run_in_executor(server.pool, play, list(board.stack), board.rows, board.cols,
+                                                        board.k, args.engine, None, args.node_limit,
+                                                        server.shared_table(board)) for board in boards))
+        return time.perf_counter() - start
+
+    server = MoveServer(args.workers, move_time=None, node_limit=args.node_limit)
+    try:
+        closes = asyncio.run(connection_closes(server))
+    finally:
+        server.close()
+    print(f"first connection answered and closed at EOF: {'yes' if closes else 'NO'}")
+
+    server = MoveServer(args.workers, move_time=None, node_limit=args.node_limit)
+    try:
+        bursts, cached_seconds = asyncio.run(cached(server))
+    finally:
+        server.close()
+    print(f"{args.games} games on {args.size}x{args.size} k={args.k}, {args.moves} moves of {args.engine} each "
+          f"({args.node_limit} nodes per move), {sum(map(len, bursts))} requests")
+    print(f"  with the cache:    {server.cache.misses:5} searches {cached_seconds:8.2f}s")
+    print(f"  {server.cache}")
+
+    server = MoveServer(args.workers, move_time=None, node_limit=args.node_limit)
+    try:
+        uncached_seconds = asyncio.run(uncached(server, bursts))
+    finally:
+        server.close()
+    print(f"  without the cache: {sum(map(len, bursts)):5} searches {uncached_seconds:8.2f}s "
+          f"({uncached_seconds / cached_seconds:.1f}x slower)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tic Tac Toe AI benchmarks')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    board = commands.add_parser('board', help='bitboard Board vs NumPy grid Board')
+    board.add_argument('--size', type=int, default=3)
+    board.set_defaults(run=bench_board)
+
+    symmetry = commands.add_parser('symmetry', help='positions per ply with and without symmetry reduction')
+    symmetry.add_argument('--size', type=int, default=4)
+    symmetry.add_argument('--depth', type=int, default=4)
+    symmetry.set_defaults(run=bench_symmetry)
+
+    pvs = commands.add_parser('pvs', help='Principal Variation Search against plain alpha-beta')
+    pvs.add_argument('--depth', type=int, default=6)
+    pvs.set_defaults(run=bench_pvs)
+
+    mtdf = commands.add_parser('mtdf', help='MTD(f) against Principal Variation Search')
+    mtdf.add_argument('--depth', type=int, default=6)
+    mtdf.set_defaults(run=bench_mtdf)
+
+    parallel = commands.add_parser('parallel', help='root splitting speedup for 1..N worker processes')
+    parallel.add_argument('--workers', type=int, default=os.cpu_count())
+    parallel.add_argument('--size', type=int, default=5)
+    parallel.add_argument('--k', type=int, default=4)
+    parallel.add_argument('--depth', type=int, default=6)
+    parallel.set_defaults(run=bench_parallel)
+
+    lazysmp = commands.add_parser('lazysmp', help='Lazy SMP speedup and shared table hit rate for 1..N workers')
+    lazysmp.add_argument('--workers', type=int, default=os.cpu_count())
+    lazysmp.add_argument('--size', type=int, default=5)
+    lazysmp.add_argument('--k', type=int, default=4)
+    lazysmp.add_argument('--depth', type=int, default=6)
+    lazysmp.set_defaults(run=bench_lazysmp)
+
+    batch = commands.add_parser('batch', help='batch.final_states against one Board per position')
+    batch.add_argument('--boards', type=int, default=1000000)
+    batch.add_argument('--size', type=int, default=3)
+    batch.add_argument('--k', type=int, default=3)
+    batch.set_defaults(run=bench_batch)
+
+    engines = commands.add_parser('engines', help='latency, nodes/s and peak memory of every engine')
+    engines.add_argument('--size', type=int, choices=sorted({shape[0] for shape in SUITE}), default=None,
+                         help='only this board (default: all)')
+    engines.add_argument('--engines', nargs='+', choices=list(ENGINES), default=None)
+    engines.add_argument('--warmup', type=int, default=1, help='untimed runs over the positions')
+    engines.add_argument('--repeat', type=int, default=5, help='timed runs over the positions')
+    engines.add_argument('--out', default=None, help='write the results to this JSON file')
+    engines.add_argument('--baseline', default=None, help='JSON file of an earlier run to compare the medians with')
+    engines.set_defaults(run=bench_engines)
+
+    startup = commands.add_parser('startup', help='import time of the engine modules')
+    startup.add_argument('--repeat', type=int, default=5)
+    startup.set_defaults(run=bench_startup)
+
+    serve = commands.add_parser('serve', help="move server bursts with and without its cache")
+    serve.add_argument('--games', type=int, default=40, help='games that move at the same time')
+    serve.add_argument('--moves', type=int, default=3, help="engine moves of every game")
+    serve.add_argument('--size', type=int, default=5)
+    serve.add_argument('--k', type=int, default=3)
+    serve.add_argument('--engine', choices=list(ENGINES), default='pvs')
+    serve.add_argument('--node-limit', type=int, default=5000)
+    serve.add_argument('--workers', type=int, default=None)
+    serve.add_argument('--seed', type=int, default=0)
+    serve.set_defaults(run=bench_serve)
+
+    args = parser.parse_args()
+    args.run(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+# bitboard version of the Board used by all the AIs
+# every player owns one integer mask, square (row, col) is bit row * cols + col
+# empty squares are the complement of both masks
+# wins are tracked while marking: every line keeps a count of each player's marks,
+# so a move only touches the lines through its square and final_state() is a lookup
+# the zobrist hash (with the side to move) is also updated on every mark and undo
+
+from rules import get_rules
+from zobrist import zobrist_keys
+
+
+class Board:
+
+    def __init__(self, rows=3, cols=3, k=3):
+        self.rows = rows
+        self.cols = cols
+        self.k = k
+        self.rules = get_rules(cols, rows, k)
+
+        # shortcuts to the shared tables of the rules
+        self.cells = self.rules.cells
+        self.full_mask = self.rules.full_mask
+        self.lines = self.rules.lines
+        self.line_masks = self.rules.line_masks
+        self.cell_lines = self.rules.cell_lines
+        self.sqrs = self.rules.sqrs
+        self.keys, self.side_key = zobrist_keys(self.cells)
+        self.masks = [0, 0, 0]  # masks[1] player 1, masks[2] player 2 (masks[0] unused)
+        self.marked_sqrs = 0
+        self.stack = []  # (index, player) of every mark, so the search can undo in place
+        self.counts = [None, [0] * len(self.lines), [0] * len(self.lines)]  # marks per line per player
+        self.winner = 0
+        self.win_line = None  # index of the completed line
+        self.win_ply = None  # stack position of the winning mark, popping it clears the win
+        self.hash = 0  # zobrist hash of the marks and the player to move
+
+    def final_state(self, show=False):
+        # return 0 if no win, return 1 if player 1 is win, return 2 if player 2 is win
+        if self.winner and show:
+            self.draw_win(self.lines[self.win_line], self.winner)
+        return self.winner
+
+    def draw_win(self, line, player):
+        # only the UI needs pygame, so it is imported here and not with the module
+        import pygame
+        from constants import SQSIZE, LINE_WIDTH, CROSS_WIDTH, CIR_COLOR, CROSS_COLOR
+
+        (row0, col0), (row1, col1) = self.sqrs[line[0]], self.sqrs[line[-1]]
+        dr = (row1 > row0) - (row1 < row0)
+        dc = (col1 > col0) - (col1 < col0)
+        ext = SQSIZE // 2 - 20  # stretch the line from the square centers to 20px from the edge
+
+        color = CIR_COLOR if player == 2 else CROSS_COLOR
+        width = CROSS_WIDTH if dr and dc else LINE_WIDTH
+        iPos = (col0 * SQSIZE + SQSIZE // 2 - dc * ext, row0 * SQSIZE + SQSIZE // 2 - dr * ext)
+        fPos = (col1 * SQSIZE + SQSIZE // 2 + dc * ext, row1 * SQSIZE + SQSIZE // 2 + dr * ext)
+        pygame.draw.line(pygame.display.get_surface(), color, iPos, fPos, width)
+
+    def mark_sqr(self, row, col, player):
+        self.push(row, col, player)
+
+    # --- MAKE / UNMAKE ---
+
+    # the search marks a square, recurses, then pops it again instead of copying the board
+    def push(self, row, col, player):
+        idx = row * self.cols + col
+        self.masks[player] |= 1 << idx
+        self.marked_sqrs += 1
+        self.hash ^= self.keys[player][idx] ^ self.side_key
+
+        counts = self.counts[player]
+        for line in self.cell_lines[idx]:
+            counts[line] += 1
+            if counts[line] == self.k and not self.winner:
+                self.winner = player
+                self.win_line = line
+                self.win_ply = len(self.stack)
+
+        self.stack.append((idx, player))
+
+    def pop(self):
+        idx, player = self.stack.pop()
+        self.masks[player] ^= 1 << idx
+        self.marked_sqrs -= 1
+        self.hash ^= self.keys[player][idx] ^ self.side_key
+
+        counts = self.counts[player]
+        for line in self.cell_lines[idx]:
+            counts[line] -= 1
+        if self.win_ply == len(self.stack):
+            self.winner = 0
+            self.win_line = None
+            self.win_ply = None
+
+        return self.sqrs[idx]
+
+    def empty_sqr(self, row, col):
+        return not (self.masks[1] | self.masks[2]) >> (row * self.cols + col) & 1
+
+    def get_empty_sqrs(self):
+        empty = ~(self.masks[1] | self.masks[2]) & self.full_mask
+        empty_sqrs = []
+        while empty:
+            low = empty & -empty
+            empty_sqrs.append(self.sqrs[low.bit_length() - 1])
+            empty ^= low
+
+        return empty_sqrs
+
+    def isfull(self):
+        return self.marked_sqrs == self.cells
+
+    def isempty(self):
+        return self.marked_sqrs == 0
+
+    def copy(self):
+        # the rules tables are shared, only the marks belong to this board
+        new_board = object.__new__(type(self))
+        new_board.__dict__.update(self.__dict__)
+        new_board.masks = self.masks[:]
+        new_board.stack = self.stack[:]
+        new_board.counts = [None, self.counts[1][:], self.counts[2][:]]
+        return new_board
+
+    def __deepcopy__(self, memo):
+        return self.copy()
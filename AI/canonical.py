@@ -0,0 +1,123 @@
+# symmetries of the board (the dihedral group D4: 4 rotations and 4 reflections)
+# each symmetry is precomputed once as a square permutation and as byte lookup tables,
+# so a bitboard mask is moved 8 squares at a time instead of rebuilding a board
+# canonical() picks the smallest key of all symmetric copies of a position, plus the
+# transform that gives it, so a cached move can be mapped back onto the real board
+# unique_moves() keeps one move out of every group of moves that are symmetric on this position
+
+from functools import lru_cache
+
+# transform id -> new (row, col) of square (row, col) on an n x m board
+TRANSFORMS = (
+    ('identity', lambda row, col, h, w: (row, col)),
+    ('rot90', lambda row, col, h, w: (w - 1 - col, row)),  # counter-clockwise, like np.rot90
+    ('rot180', lambda row, col, h, w: (h - 1 - row, w - 1 - col)),
+    ('rot270', lambda row, col, h, w: (col, h - 1 - row)),
+    ('flipud', lambda row, col, h, w: (h - 1 - row, col)),
+    ('fliplr', lambda row, col, h, w: (row, w - 1 - col)),
+    ('transpose', lambda row, col, h, w: (col, row)),
+    ('antitranspose', lambda row, col, h, w: (w - 1 - col, h - 1 - row)),
+)
+TRANSFORM_IDS = {name: t for t, (name, _) in enumerate(TRANSFORMS)}
+SQUARE_ONLY = {'rot90', 'rot270', 'transpose', 'antitranspose'}  # these swap rows and columns
+
+
+class Symmetry:
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.cells = width * height
+
+        # a rectangle only keeps the 4 symmetries that do not swap rows and columns
+        self.transforms = [t for t, (name, _) in enumerate(TRANSFORMS)
+                           if width == height or name not in SQUARE_ONLY]
+
+        self.perms = [None] * len(TRANSFORMS)  # perms[t][idx] -> idx after the transform
+        self.inverse = [None] * len(TRANSFORMS)
+        self.tables = [None] * len(TRANSFORMS)  # tables[t][chunk][byte] -> moved bits
+        for t in self.transforms:
+            fn = TRANSFORMS[t][1]
+            perm = []
+            for idx in range(self.cells):
+                new_row, new_col = fn(*divmod(idx, width), height, width)
+                perm.append(new_row * width + new_col)
+            self.perms[t] = tuple(perm)
+
+            inverse = [0] * self.cells
+            for idx, new_idx in enumerate(perm):
+                inverse[new_idx] = idx
+            self.inverse[t] = tuple(inverse)
+
+            tables = []
+            for chunk in range(0, self.cells, 8):
+                table = []
+                for byte in range(256):
+                    moved = 0
+                    for bit in range(8):
+                        if byte >> bit & 1 and chunk + bit < self.cells:
+                            moved |= 1 << perm[chunk + bit]
+                    table.append(moved)
+                tables.append(tuple(table))
+            self.tables[t] = tuple(tables)
+
+    def apply(self, t, mask):
+        # move every set bit of mask with transform t
+        moved = 0
+        for table in self.tables[t]:
+            moved |= table[mask & 0xFF]
+            mask >>= 8
+        return moved
+
+    def key(self, t, board):
+        # both masks of the transformed board packed in one integer
+        return self.apply(t, board.masks[1]) | self.apply(t, board.masks[2]) << self.cells
+
+    def canonical(self, board):
+        # smallest key among the symmetric copies, and the transform that produced it
+        # (the player to move follows from the number of marks, so it is not in the key)
+        best_key, best_t = None, 0
+        for t in self.transforms:
+            key = self.key(t, board)
+            if best_key is None or key < best_key:
+                best_key, best_t = key, t
+        return best_key, best_t
+
+    def stabiliser(self, board):
+        # the transforms that leave the position as it is (always at least the identity)
+        x, o = board.masks[1], board.masks[2]
+        return [t for t in self.transforms if self.apply(t, x) == x and self.apply(t, o) == o]
+
+    def unique_moves(self, board):
+        # empty squares with the symmetric duplicates removed, e.g. one corner on the empty board
+        # a square is kept when no symmetry of the position sends it to a lower index
+        stabiliser = self.stabiliser(board)
+        if len(stabiliser) == 1:
+            return board.get_empty_sqrs()
+
+        perms = [self.perms[t] for t in stabiliser if t != 0]
+        moves = []
+        for (row, col) in board.get_empty_sqrs():
+            idx = row * self.width + col
+            if all(perm[idx] >= idx for perm in perms):
+                moves.append((row, col))
+        return moves
+
+    # --- MOVES ---
+
+    def to_canonical(self, t, move):
+        # (row, col) on the real board -> (row, col) on the canonical board
+        if move is None:
+            return None
+        return divmod(self.perms[t][move[0] * self.width + move[1]], self.width)
+
+    def from_canonical(self, t, move):
+        # (row, col) on the canonical board -> (row, col) on the real board
+        if move is None:
+            return None
+        return divmod(self.inverse[t][move[0] * self.width + move[1]], self.width)
+
+
+@lru_cache(maxsize=None)
+def get_symmetry(width=3, height=3):
+    return Symmetry(width, height)
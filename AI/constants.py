@@ -1,4 +1,4 @@
-import pygame
+# sizes and colors of the game, plain values: the window is made by the game scripts (init_screen)
 
 WIDTH = 600
 HEIGHT = 600
@@ -6,13 +6,16 @@ EMPTY = 0
 # row&colums
 ROW = 5
 COL = 5
+# marks in a row needed to win
+WIN_LEN = 3
+# seconds the AI may think about one move (the searches stop at the deepest depth that fits)
+MOVE_TIME = 2.0
 SQSIZE = WIDTH // COL
 LINE_WIDTH = 15
 CIR_WIDTH=15
 CROSS_WIDTH=20
 RADUIS=SQSIZE // 4
 OFFSET=50
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
 
 # COLORS
 BG_COLOR =(52, 52, 52)
@@ -1,79 +1,62 @@
-import copy
-import sys
 import time
-import pygame
-import numpy as np
-import psutil
+from bitboard import Board
+from ordering import MoveOrdering, FEATURES
+from search import Budget, horizon, iterative_deepening
+from stats import SearchStats
 
 # Constants
 WIDTH, HEIGHT = 600, 600
-SQSIZE = WIDTH // 3
 ROW, COL = 5, 5
+WIN_LEN = 3
+SQSIZE = WIDTH // COL
 OFFSET = 15
 LINE_WIDTH = 15
 CROSS_WIDTH = 25
 CIR_WIDTH = 15
 RADUIS = SQSIZE // 3
+MOVE_TIME = 2.0  # seconds per AI move
 
 BG_COLOR = (255, 255, 255)
 LINE_COLOR = (0, 0, 0)
 CROSS_COLOR = (255, 0, 0)
 CIR_COLOR = (0, 0, 255)
 
-WINNING_LINES = [
-    (0, 1, 2), (3, 4, 5), (6, 7, 8),  # Rows
-    (0, 3, 6), (1, 4, 7), (2, 5, 8),  # Columns
-    (0, 4, 8), (2, 4, 6)  # Diagonals
-]
-
 # Pygame setup
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('TIC TAC TOE AI')
-screen.fill(BG_COLOR)
-
-# Classes
-class Board:
-    def __init__(self):
-        self.squares = np.zeros((ROW, COL))
-        self.empty_sqrs = self.squares
-        self.marked_sqrs = 0
-        self.player = 1
-
-    def final_state(self, show=False):
-        for line in WINNING_LINES:
-            if all(self.squares.flatten()[i] == 1 for i in line):
-                return 1
-            elif all(self.squares.flatten()[i] == 2 for i in line):
-                return 2
-
-        return 0
+# the window is only made when the game starts, so the AI can be imported without pygame or a display
+pygame = screen = None
 
-    def mark_sqr(self, row, col, player):
-        self.squares[row][col] = player
-        self.marked_sqrs += 1
 
-    def empty_sqr(self, row, col):
-        return self.squares[row][col] == 0
+def init_screen():
+    global pygame, screen
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('TIC TAC TOE AI')
+    screen.fill(BG_COLOR)
 
-    def get_empty_sqrs(self):
-        empty_sqrs = []
-        for row in range(ROW):
-            for col in range(COL):
-                if self.empty_sqr(row, col):
-                    empty_sqrs.append((row, col))
-        return empty_sqrs
-
-    def isfull(self):
-        return self.marked_sqrs == 9
 
+# Classes
 class AI:
-    def __init__(self, level=1, player=2):
+    def __init__(self, level=1, player=2, time_limit=MOVE_TIME, node_limit=None, aspiration=2,
+                 ordering=FEATURES, stats=False):
         self.level = level
         self.player = player
         self.nodes_expanded = 0
+        # budget of one move (seconds and/or nodes), None for both searches to the end of the game
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.aspiration = aspiration
+        self.budget = None
+        self.ordering = MoveOrdering(ordering)  # which move ordering heuristics to use, see ordering.py
+        self.stats = SearchStats() if stats else None  # stats=True prints what every search did, see stats.py
+
+    # max_depth: stop looking ahead after this many moves, None to search to the end of the game
+    def minimax_heuristic(self, board, maximizing, depth=0, alpha=float('-inf'), beta=float('inf'), max_depth=None):
+        # every call is one node
+        self.nodes_expanded += 1
+        if self.stats is not None:
+            self.stats.node(board)
 
-    def minimax_heuristic(self, board, maximizing, depth=0, alpha=float('-inf'), beta=float('inf')):
         case = board.final_state()
 
         if case == 1:
@@ -82,51 +65,67 @@ class AI:
             return depth - 10, None
         elif board.isfull():
             return 0, None
+        elif depth == max_depth:
+            if self.stats is not None:
+                self.stats.leaf()
+            return horizon(board), None
+
+        if self.budget is not None:
+            self.budget.check(self.nodes_expanded)
 
         if maximizing:
             max_eval = float('-inf')
             best_move = None
-            empty_sqrs = board.get_empty_sqrs()
-
-            for (row, col) in empty_sqrs:
-                self.nodes_expanded += 1
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, 1)
-                eval, _ = self.minimax_heuristic(temp_board, False, depth + 1, alpha, beta)
-                distance = self.distance_heuristic(row, col)
+            empty_sqrs = self.ordering.order(board, board.get_empty_sqrs(), 1)
+
+            for child, (row, col) in enumerate(empty_sqrs):
+                board.push(row, col, 1)
+                eval, _ = self.minimax_heuristic(board, False, depth + 1, alpha, beta, max_depth)
+                board.pop()
+                distance = self.distance_heuristic(board, row, col)
                 eval += distance
                 if eval > max_eval:
                     max_eval = eval
                     best_move = (row, col)
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, (row, col), 1, board.cells - board.marked_sqrs, child)
+                    if self.stats is not None:
+                        self.stats.cutoff(child)
                     break
 
+            if self.stats is not None:
+                self.stats.interior(child + 1)
             return max_eval, best_move
 
         elif not maximizing:
             min_eval = float('inf')
             best_move = None
-            empty_sqrs = board.get_empty_sqrs()
-
-            for (row, col) in empty_sqrs:
-                self.nodes_expanded += 1
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, self.player)
-                eval, _ = self.minimax_heuristic(temp_board, True, depth + 1, alpha, beta)
-                distance = self.distance_heuristic(row, col)
+            empty_sqrs = self.ordering.order(board, board.get_empty_sqrs(), self.player)
+
+            for child, (row, col) in enumerate(empty_sqrs):
+                board.push(row, col, self.player)
+                eval, _ = self.minimax_heuristic(board, True, depth + 1, alpha, beta, max_depth)
+                board.pop()
+                distance = self.distance_heuristic(board, row, col)
                 eval -= distance
                 if eval < min_eval:
                     min_eval = eval
                     best_move = (row, col)
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, (row, col), self.player, board.cells - board.marked_sqrs, child)
+                    if self.stats is not None:
+                        self.stats.cutoff(child)
                     break
 
+            if self.stats is not None:
+                self.stats.interior(child + 1)
             return min_eval, best_move
 
-    def distance_heuristic(self, row, col):
-        center_row, center_col = ROW // 2, COL // 2
+    def distance_heuristic(self, board, row, col):
+        # the center of the board that is searched, not of the 5x5 window, so 3x3 games use (1, 1)
+        center_row, center_col = board.rows // 2, board.cols // 2
         return abs(row - center_row) + abs(col - center_col)
 
     def eval(self, main_board):
@@ -134,24 +133,46 @@ class AI:
             eval = 'random'
             move = self.rnd(main_board)
         else:
-            eval, move = self.minimax_heuristic(main_board, False, alpha=float('-inf'), beta=float('inf'))
+            self.ordering.new_search()
+            if self.stats is not None:
+                self.stats.start(main_board)
+            if self.time_limit is None and self.node_limit is None:
+                eval, move = self.minimax_heuristic(main_board, False, alpha=float('-inf'), beta=float('inf'))
+            else:
+                # iterative deepening, keeps the move of the deepest search that fits in the budget
+                # the distance bonus makes every score a guess, so no score ends the deepening early
+                self.budget = Budget(self.time_limit, self.node_limit)
+                self.budget.start(self.nodes_expanded)
+                eval, move, depth = iterative_deepening(
+                    lambda depth, alpha, beta: self.minimax_heuristic(main_board, False, 0, alpha, beta, depth),
+                    main_board, self.budget, self.aspiration, decisive=float('inf'), stats=self.stats)
+                self.budget = None
+                print(f'searched {depth} moves deep')
+            if self.stats is not None:
+                self.stats.finish()
 
         if move is not None:
             row, col = move
-            distance = self.distance_heuristic(row, col)
+            distance = self.distance_heuristic(main_board, row, col)
             print(f'AI has chosen to mark the square in pos {move} with an eval of: {eval} and distance: {distance}')
+        if self.level != 0:
+            print(self.ordering)
+            if self.stats is not None:
+                print(self.stats)
 
         return move
 
     def rnd(self, board):
         empty_sqrs = board.get_empty_sqrs()
+        import numpy as np  # only the random level needs NumPy
         idx = np.random.choice(len(empty_sqrs))
         return empty_sqrs[idx]
 
 class Game:
-    def __init__(self):
-        self.board = Board()
-        self.ai = AI()
+    # ai: an AI made by the caller (main.py keeps one per game, so its tables stay warm between games)
+    def __init__(self, ai=None):
+        self.board = Board(ROW, COL, WIN_LEN)
+        self.ai = ai if ai is not None else AI()
         self.player = 1
         self.running = True
         self.show_lines()
@@ -159,14 +180,14 @@ class Game:
     def show_lines(self):
         screen.fill(BG_COLOR)
 
-        pygame.draw.line(screen, LINE_COLOR, (SQSIZE, 0), (SQSIZE, HEIGHT), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (WIDTH - SQSIZE, 0), (WIDTH - SQSIZE, HEIGHT), LINE_WIDTH)
+        for col in range(1, COL):
+            pygame.draw.line(screen, LINE_COLOR, (col * SQSIZE, 0), (col * SQSIZE, HEIGHT), LINE_WIDTH)
 
-        pygame.draw.line(screen, LINE_COLOR, (0, SQSIZE), (WIDTH, SQSIZE), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (0, HEIGHT - SQSIZE), (WIDTH, HEIGHT - SQSIZE), LINE_WIDTH)
+        for row in range(1, ROW):
+            pygame.draw.line(screen, LINE_COLOR, (0, row * SQSIZE), (WIDTH, row * SQSIZE), LINE_WIDTH)
 
     def draw_fig(self, row, col):
-    +    if self.player == 1:
+        if self.player == 1:
             start_desc = (col * SQSIZE + OFFSET, row * SQSIZE + OFFSET)
             end_desc = (col * SQSIZE + SQSIZE - OFFSET, row * SQSIZE + SQSIZE - OFFSET)
             pygame.draw.line(screen, CROSS_COLOR, start_desc, end_desc, CROSS_WIDTH)
@@ -187,19 +208,25 @@ class Game:
         self.player = self.player % 2 + 1
 
     def isover(self):
-        return self.board.final_state(show=True) != 0 or self.board.isfull()
+        # this window uses its own colors and square size, so the shared win line is not drawn here
+        return self.board.final_state() != 0 or self.board.isfull()
 
     def reset(self):
-        self.__init__()
+        self.__init__(self.ai)
+
+# keep_ai: the AI of every game, kept by main.py; closing the window returns so the game can be
+# started again from there
+def main(keep_ai=None):
+    init_screen()
+    import psutil  # only the game window reports the memory of the process
 
-def main():
-    game = Game()
+    game = Game(keep_ai)
 
     while True:
         for event in pygame.event.get():
             if event.type == pygame.QUIT:
                 pygame.quit()
-                sys.exit()
+                return
             if event.type == pygame.MOUSEBUTTONDOWN:
                 pos = event.pos
                 row = pos[1] // SQSIZE
@@ -0,0 +1,275 @@
+# every AI of the project behind one interface, for tournament.py and benchmark.py engines
+# an engine is made for one game: engine.move(board) -> (row, col) for the player to move on a
+# bitboard.Board, engine.nodes counts the nodes it searched so far (0 for engines without a search)
+#
+# a game script is only imported when one of its engines is made (importing it opens no window).
+# Their AI classes always play player 2 (the minimizing side), so
+# when such an engine plays player 1 it gets a copy of the board with the colours swapped
+# a script engine is made new for every game: the tables of the scripts do not keep the
+# player to move, and a table filled with swapped colours would be wrong for the other side
+
+import importlib
+import importlib.util
+import os
+import random
+import sys
+
+from bitboard import Board
+from ordering import MoveOrdering
+from search import Budget, Searcher
+from transposition import TranspositionTable
+
+MCTS_PLAYOUTS = 20000  # random games per move when MCTS has no time limit
+
+_HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_script(filename):
+    # the module of one of the game scripts, also the ones with spaces in their file name
+    name = os.path.splitext(filename)[0]
+    if name.isidentifier():
+        return importlib.import_module(name)
+    key = 'script_' + ''.join(c if c.isalnum() else '_' for c in name)
+    if key not in sys.modules:
+        spec = importlib.util.spec_from_file_location(key, os.path.join(_HERE, filename))
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[key] = module
+        spec.loader.exec_module(module)
+    return sys.modules[key]
+
+
+class Engine:
+    # seed: for engines that pick random moves
+    # move_time / node_limit: budget of one move of the searching engines, None for both to search to the end
+    # (MCTS counts random games as nodes)
+
+    sizes = None  # (rows, cols, k) of the boards the engine can play, None for any
+    budgeted = True  # False: the engine plays at once (random, or a full search of a 3x3 board) and has no budget
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        if self.sizes is not None and (board.rows, board.cols, board.k) not in self.sizes:
+            raise ValueError(f"{type(self).__name__} only plays {self.sizes}, "
+                             f"not {(board.rows, board.cols, board.k)}")
+        self.seed = seed
+        self.move_time = move_time
+        self.node_limit = node_limit
+        self.nodes = 0
+        # what the search thinks of the last move for the player to move, on its own scale
+        # (negamax score, MCTS win rate), None for engines that do not say
+        self.score = None
+
+    def set_budget(self, move_time=None, node_limit=None):
+        # the budget of the next moves, for an engine that is kept between requests (server.py)
+        self.move_time = move_time
+        self.node_limit = node_limit
+
+    def move(self, board):
+        raise NotImplementedError
+
+
+# --- RANDOM ---
+
+class RandomEngine(Engine):
+    budgeted = False
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        self.rng = random.Random(seed)
+
+    def move(self, board):
+        return self.rng.choice(board.get_empty_sqrs())
+
+
+# --- GAME SCRIPTS ---
+
+class ScriptEngine(Engine):
+    # the AI class of one of the pygame scripts
+
+    script = None
+    board_class = Board
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        self.module = load_script(self.script)
+        self.ai = self.make_ai()
+
+    def make_ai(self):
+        return self.module.AI(time_limit=self.move_time, node_limit=self.node_limit)
+
+    def set_budget(self, move_time=None, node_limit=None):
+        super().set_budget(move_time, node_limit)
+        self.ai.time_limit = move_time
+        self.ai.node_limit = node_limit
+
+    def own_board(self, board):
+        # the board as the script sees it, with the player to move as player 2
+        swap = board.marked_sqrs % 2 == 0
+        own = self.board_class(board.rows, board.cols, board.k)
+        for idx, player in board.stack:
+            own.push(*divmod(idx, board.cols), 3 - player if swap else player)
+        return own
+
+    def move(self, board):
+        nodes = self.ai.nodes_expanded
+        move = self.ai.eval(self.own_board(board))
+        self.nodes += self.ai.nodes_expanded - nodes
+        return move
+
+
+class MinimaxEngine(ScriptEngine):
+    script = 'tictactoe.py'
+
+
+class AlphaBetaEngine(ScriptEngine):
+    script = 'Alpha_beta.py'
+
+
+class HeuristicEngine(ScriptEngine):
+    script = 'heuristic.py'
+
+
+class SymmetryEngine(ScriptEngine):
+    script = 'symmtry.py'
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        self.board_class = self.module.Board
+
+
+class DistanceEngine(ScriptEngine):
+    script = 'distance_improve.py'
+
+
+# --- 3x3 SCRIPTS WITH THEIR OWN BOARDS ---
+
+def marks(board):
+    # the 9 squares of a 3x3 board as ' ', 'X' and 'O', the board of these scripts
+    squares = [' '] * 9
+    for idx, player in board.stack:
+        squares[idx] = 'X' if player == 1 else 'O'
+    return squares
+
+
+class BFSEngine(Engine):
+    # BF_Search.py: wins, blocks, then prefers the center and the corners
+    sizes = [(3, 3, 3)]
+    budgeted = False
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        self.module = load_script('BF_Search.py')
+
+    def move(self, board):
+        squares = marks(board)
+        grid = [squares[row * 3:row * 3 + 3] for row in range(3)]
+        if board.isempty():
+            # the same first move as the window: a random corner
+            return random.choice([(0, 0), (0, 2), (2, 0), (2, 2)])
+        counter = [0]
+        move = self.module.bfs_move(grid, 'X' if board.marked_sqrs % 2 == 0 else 'O', counter)
+        self.nodes += counter[0]
+        return move
+
+
+class WinningMovesEngine(Engine):
+    # minimax by heuristic fun(winning moves).py: alpha-beta on a list of 9 squares
+    sizes = [(3, 3, 3)]
+    budgeted = False
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        self.module = load_script('minimax by heuristic fun(winning moves).py')
+        self.space = self.module.SearchSpaceStats()
+        self.stats = None  # a stats.SearchStats that gets every search, None to not keep one
+
+    def move(self, board):
+        squares = marks(board)
+        nodes = self.space.nodes_explored_with_pruning
+        move = self.module.get_ai_move(squares, self.space, 'X' if board.marked_sqrs % 2 == 0 else 'O', self.stats)
+        self.nodes += self.space.nodes_explored_with_pruning - nodes
+        return divmod(move, 3)
+
+
+class ReductionEngine(Engine):
+    # additional cose/heuristic reduction.py: find_best_move always maximizes for 'O',
+    # so when X is to move it gets the board with the marks swapped
+    sizes = [(3, 3, 3)]
+    budgeted = False
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        self.module = load_script(os.path.join('additional cose', 'heuristic reduction.py'))
+        self.stats = None  # a stats.SearchStats that gets every search, None to not keep one
+
+    def move(self, board):
+        squares = marks(board)
+        if board.marked_sqrs % 2 == 0:
+            squares = [{'X': 'O', 'O': 'X'}.get(square, square) for square in squares]
+        grid = [squares[row * 3:row * 3 + 3] for row in range(3)]
+        counter = [0]
+        move = self.module.find_best_move(grid, 'O', counter, self.stats)
+        self.nodes += counter[0]
+        return move
+
+
+# --- HEADLESS SEARCHES ---
+
+class PVSEngine(Engine):
+    mtdf = False
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        self.searcher = Searcher(TranspositionTable(), MoveOrdering())
+
+    def move(self, board):
+        nodes = self.searcher.nodes
+        budget = None
+        if self.move_time is not None or self.node_limit is not None:
+            budget = Budget(self.move_time, self.node_limit)
+        self.score, move = self.searcher.best_move(board, budget, mtdf=self.mtdf)[:2]
+        self.nodes += self.searcher.nodes - nodes
+        return move
+
+
+class MTDfEngine(PVSEngine):
+    mtdf = True
+
+
+class MCTSEngine(Engine):
+    # nodes are the random games played
+
+    def __init__(self, board, seed=None, move_time=None, node_limit=None):
+        super().__init__(board, seed, move_time, node_limit)
+        from mcts import MCTS  # NumPy is only loaded for the engines that use it
+        self.mcts = MCTS(seed=seed)
+
+    def move(self, board):
+        limit = self.node_limit
+        if limit is None and self.move_time is None:
+            limit = MCTS_PLAYOUTS
+        playouts = self.mcts.playouts
+        self.score, move = self.mcts.best_move(board, self.move_time, limit)
+        self.nodes += self.mcts.playouts - playouts
+        return move
+
+
+ENGINES = {
+    'random': RandomEngine,
+    'minimax': MinimaxEngine,
+    'alphabeta': AlphaBetaEngine,
+    'heuristic': HeuristicEngine,
+    'symmetry': SymmetryEngine,
+    'distance': DistanceEngine,
+    'bfs': BFSEngine,
+    'winning': WinningMovesEngine,
+    'reduction': ReductionEngine,
+    'pvs': PVSEngine,
+    'mtdf': MTDfEngine,
+    'mcts': MCTSEngine,
+}
+
+
+def make_engine(name, board, seed=None, move_time=None, node_limit=None):
+    if name not in ENGINES:
+        raise ValueError(f"unknown engine {name!r} (use one of {', '.join(ENGINES)})")
+    return ENGINES[name](board, seed, move_time, node_limit)
@@ -0,0 +1,215 @@
+# Lazy SMP: every worker process runs the same iterative deepening search of the same position,
+# the only thing they share is one transposition table in shared memory
+# the workers start at staggered depths, so while one finishes depth d another is already on d+1
+# and their entries fill the table for each other; the deepest finished search gives the move
+#
+# the shared table has no locks: a slot is two 64-bit words, (key ^ data, data)
+# a probe only trusts a slot when the two words XOR back to its key, so a slot torn by two
+# processes writing at the same time reads as a miss instead of a wrong entry
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+
+from bitboard import Board
+from ordering import MoveOrdering, FEATURES
+from search import Budget, Searcher, SearchTimeout, WIN
+from stats import SearchStats
+from transposition import DEFAULT_BYTES, MIN_SLOTS
+
+SLOT_BYTES = 16  # two uint64 words
+_MASK64 = (1 << 64) - 1
+_GOLDEN = 0x9E3779B97F4A7C15
+
+# data word: score (32 bits, offset) | flag (2) | depth (8) | move (8, row << 4 | col) | used (1)
+_SCORE_OFFSET = 1 << 31
+_NO_MOVE = 0xFF
+_USED = 1 << 50
+
+
+class SharedTranspositionTable:
+    # same probe/store as TranspositionTable, in a multiprocessing.shared_memory block
+    # boards up to 15x15 (a move is stored as row and col in 4 bits each)
+
+    def __init__(self, max_bytes=DEFAULT_BYTES, policy='depth', name=None):
+        if policy not in ('depth', 'always'):
+            raise ValueError(f"unknown replacement policy {policy!r} (use 'depth' or 'always')")
+        self.policy = policy
+
+        if name is None:
+            # the creating process owns the block and unlinks it in close()
+            bits = max((max_bytes // SLOT_BYTES).bit_length() - 1, MIN_SLOTS.bit_length() - 1)
+            self.shm = shared_memory.SharedMemory(create=True, size=SLOT_BYTES << bits)
+            self.owner = True
+        else:
+            # workers of the pool share the resource tracker of the main process, so attaching is safe
+            self.shm = shared_memory.SharedMemory(name=name)
+            self.owner = False
+        self.name = self.shm.name
+        self.size = self.shm.size // SLOT_BYTES
+        self.bits = self.size.bit_length() - 1
+        self.words = self.shm.buf.cast('Q')
+
+        # --- COUNTERS (of this process) ---
+        self.hits = 0
+        self.misses = 0
+        self.collisions = 0
+        self.stores = 0
+        self.replaced = 0
+
+    def index(self, key):
+        return (((key * _GOLDEN) & _MASK64) >> (64 - self.bits)) << 1
+
+    def probe(self, key):
+        i = self.index(key)
+        check, data = self.words[i], self.words[i + 1]
+        if not data & _USED:
+            self.misses += 1
+            return None
+        if check ^ data != key:
+            self.collisions += 1
+            return None
+        self.hits += 1
+        move = data >> 42 & 0xFF
+        return ((data & 0xFFFFFFFF) - _SCORE_OFFSET, data >> 32 & 3, data >> 34 & 0xFF,
+                None if move == _NO_MOVE else (move >> 4, move & 15))
+
+    def store(self, key, value, flag, depth, move):
+        i = self.index(key)
+        old = self.words[i + 1]
+        if old & _USED and self.words[i] ^ old != key:
+            if self.policy == 'depth' and old >> 34 & 0xFF > depth:
+                return
+            self.replaced += 1
+        move = _NO_MOVE if move is None else move[0] << 4 | move[1]
+        data = (value + _SCORE_OFFSET) | flag << 32 | depth << 34 | move << 42 | _USED
+        self.words[i] = key ^ data
+        self.words[i + 1] = data
+        self.stores += 1
+
+    def clear(self):
+        self.shm.buf[:] = bytes(self.shm.size)
+
+    def hit_rate(self):
+        probes = self.hits + self.misses + self.collisions
+        return self.hits / probes if probes else 0.0
+
+    def close(self):
+        self.words.release()
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+    def __str__(self):
+        return (f"shared TT hits: {self.hits} misses: {self.misses} collisions: {self.collisions} "
+                f"stores: {self.stores} replaced: {self.replaced} hit rate: {self.hit_rate():.1%}")
+
+
+# --- WORKER PROCESS ---
+
+_stop = None  # set when one worker has finished, the others stop
+_searcher = None
+
+
+class SharedBudget(Budget):
+    # the move's time or node budget, and the stop flag of the main process
+
+    def check(self, nodes):
+        super().check(nodes)
+        if self.checks & 63 == 0 and _stop.value:
+            raise SearchTimeout
+
+
+def init_worker(name, stop, ordering, stats):
+    global _stop, _searcher
+    _stop = stop
+    _searcher = Searcher(SharedTranspositionTable(name=name), MoveOrdering(ordering),
+                         stats=SearchStats() if stats else None)
+
+
+def search(stack, rows, cols, k, seconds, nodes, max_depth, first_depth):
+    # (score, move, depth reached, nodes, (hits, misses, collisions), SearchStats.as_dict() or None) of one worker
+    board = Board(rows, cols, k)
+    for idx, player in stack:
+        board.push(*divmod(idx, cols), player)
+
+    tt = _searcher.tt
+    counters = _searcher.nodes, tt.hits, tt.misses, tt.collisions
+    score, move, depth = _searcher.best_move(board, SharedBudget(seconds, nodes), max_depth, first_depth=first_depth)
+    return (score, move, depth, _searcher.nodes - counters[0],
+            (tt.hits - counters[1], tt.misses - counters[2], tt.collisions - counters[3]),
+            _searcher.stats and _searcher.stats.as_dict())
+
+
+def ready(_):
+    return os.getpid()
+
+
+# --- MAIN PROCESS ---
+
+class LazySMP:
+
+    def __init__(self, workers=None, tt_bytes=DEFAULT_BYTES, ordering=FEATURES, stats=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.ordering = ordering
+        self.stats = stats  # SearchStats of the last search, the workers' searches added up, None to not keep any
+        self.tt = SharedTranspositionTable(tt_bytes)
+        self.stop = multiprocessing.Value('b', 0)
+        self.pool = None
+
+        # --- COUNTERS (all workers) ---
+        self.nodes = 0
+        self.hits = 0
+        self.probes = 0
+
+    def start(self):
+        # the pool is started on the first search and kept for the next moves
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                            initargs=(self.tt.name, self.stop, self.ordering, self.stats is not None))
+            list(self.pool.map(ready, range(self.workers)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+        self.tt.close()
+
+    def best_move(self, board, seconds=None, nodes=None, max_depth=None):
+        # returns (score for the player to move, move, depth reached) of the deepest finished search
+        self.start()
+        if self.stats is not None:
+            self.stats.start(board)
+        self.stop.value = 0
+        task = (list(board.stack), board.rows, board.cols, board.k, seconds, nodes, max_depth)
+        # odd workers start one move deeper than even ones
+        futures = [self.pool.submit(search, *task, 1 + worker % 2) for worker in range(self.workers)]
+
+        # the first worker to finish its search ends the move for all of them
+        wait(futures, return_when=FIRST_COMPLETED)
+        self.stop.value = 1
+        results = [future.result() for future in futures]
+
+        # a proven win or loss (it can come early from another worker's entry) beats any deeper guess
+        best, best_rank, best_counts = None, None, None
+        for score, move, depth, worker_nodes, (hits, misses, collisions), counts in results:
+            self.nodes += worker_nodes
+            self.hits += hits
+            self.probes += hits + misses + collisions
+            if counts is not None:
+                self.stats.add(counts)
+            rank = (score is not None and abs(score) >= WIN, depth)
+            if best is None or rank > best_rank:
+                best, best_rank, best_counts = (score, move, depth), rank, counts
+        if self.stats is not None:
+            # the depths are the ones of the worker that gave the move
+            self.stats.iterations = best_counts['iterations']
+            self.stats.finish()
+        return best
+
+    def hit_rate(self):
+        return self.hits / self.probes if self.probes else 0.0
+
+    def __str__(self):
+        return f"Lazy SMP workers: {self.workers} nodes: {self.nodes} shared TT hit rate: {self.hit_rate():.1%}"
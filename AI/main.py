@@ -1,36 +1,66 @@
+# starts the games of the project from one window, all in this process, run from the AI folder:
+#   python main.py
+# a game script is imported the first time its button is pressed and stays imported, so pygame and
+# NumPy are loaded once; the AI of every pygame game is kept between its games, with its tables
+#
+# the pygame games run their own loop, the launcher is hidden until their window is closed
+# the tkinter games open in a window of the launcher and share its loop
 
+import time
 import tkinter as tk
-import subprocess
-import sys
-
-def open_program(program_path):
-    try:
-        subprocess.run([sys.executable, program_path], check=True)
-    except subprocess.CalledProcessError as e:
-        print(f"Error executing the program: {e}")
-
-# Create the main window
-window = tk.Tk()
-window.title("Button Window")
-
-# Define paths for each program
-program_paths = [
-    r"D:\AI Project\AI\tictactoe.py",
-    r"D:\AI Project\AI\Alpha_beta.py",
-    r"D:\AI Project\AI\minimax by heuristic fun(winning moves).py",
-    r"D:\AI Project\AI\distance_improve.py",
-    r"D:\AI Project\AI\symmtry.py",
-    r"D:\AI Project\AI\BF_Search.py",
+
+from engines import load_script
+
+# --- GAMES ---
+
+# button text, script, and for the tkinter games how their window is made (None: a pygame game, main(ai))
+GAMES = [
+    ('Minimax', 'tictactoe.py', None),
+    ('Alpha-beta', 'Alpha_beta.py', None),
+    ('Heuristic', 'heuristic.py', None),
+    ('Winning moves heuristic', 'minimax by heuristic fun(winning moves).py',
+     lambda module, window: module.TicTacToeGUI(module.SearchSpaceStats(), window)),
+    ('Distance (5x5)', 'distance_improve.py', None),
+    ('Symmetry', 'symmtry.py', None),
+    ('Best first search', 'BF_Search.py', lambda module, window: module.TicTacToeGUI(window)),
 ]
 
-# Create six buttons with corresponding program paths
-buttons = []
-for i, program_path in enumerate(program_paths, start=1):
-    button_text = f"Button {i} ({program_path})"
-    button = tk.Button(window, text=button_text, command=lambda path=program_path: open_program(path))
-    button.pack(pady=10)
-    buttons.append(button)
 
-# Run the application
-window.mainloop()
+class Launcher:
+
+    def __init__(self, root):
+        self.root = root
+        self.root.title("Tic Tac Toe AI")
+        self.ais = {}  # script -> AI of its pygame game, kept between games
+
+        for text, script, make_window in GAMES:
+            button = tk.Button(root, text=f"{text} ({script})", width=50,
+                               command=lambda script=script, make_window=make_window: self.start(script, make_window))
+            button.pack(pady=10)
+
+    def start(self, script, make_window):
+        start = time.perf_counter()
+        module = load_script(script)
+        print(f"{script} loaded in {time.perf_counter() - start:.3f}s")
+
+        if make_window is None:
+            if script not in self.ais:
+                self.ais[script] = module.AI()
+            self.root.withdraw()
+            try:
+                module.main(self.ais[script])
+            finally:
+                self.root.deiconify()
+        else:
+            module.init_ui()
+            make_window(module, tk.Toplevel(self.root))
+
+
+def main():
+    root = tk.Tk()
+    Launcher(root)
+    root.mainloop()
+
 
+if __name__ == "__main__":
+    main()
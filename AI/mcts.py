@@ -0,0 +1,178 @@
+# Monte Carlo Tree Search (UCT) for boards too big for minimax
+# every iteration walks down the tree by the UCT score, adds one new node and plays a batch of
+# random games from it at once with NumPy, then adds the results to every node on the path
+#
+# a batch of random games needs no move loop: each empty square gets a random time (its place in
+# a random order of the empty squares), the player to move owns the even times and the other
+# player the odd ones. A line is completed at the largest time on it when one player owns all
+# of it, and the game ends on the line completed first (a draw when no line is).
+#
+# the tree is kept between moves: the next search starts from the node of the new position
+# when the board's move history continues the position of the last search
+
+import math
+import time
+
+import numpy as np
+
+SEARCH_BATCH = 64  # random games per iteration
+EXPLORATION = math.sqrt(2)
+
+
+class Node:
+
+    def __init__(self, parent, move, player):
+        self.parent = parent
+        self.move = move  # (row, col) that led here
+        self.player = player  # player that made that move, the wins are counted for that player
+        self.children = {}
+        self.untried = None  # moves not expanded yet, None until the node is first visited
+        self.visits = 0
+        self.wins = 0.0  # a draw is half a win
+
+    def uct_child(self, exploration):
+        log_visits = math.log(self.visits)
+        best, best_score = None, -1.0
+        for child in self.children.values():
+            score = child.wins / child.visits + exploration * math.sqrt(log_visits / child.visits)
+            if score > best_score:
+                best, best_score = child, score
+        return best
+
+
+class MCTS:
+
+    def __init__(self, batch=SEARCH_BATCH, exploration=EXPLORATION, seed=None, stats=None):
+        self.batch = batch
+        self.stats = stats  # SearchStats of the last search, None to not keep any
+        self.exploration = exploration
+        self.rng = np.random.default_rng(seed)
+        self.root = None
+        self.root_stack = None  # board.stack of the root position
+        self.shape = None  # (rows, cols, k) of the board the tree was built for
+        self.lines = None  # (lines, k) square indices of the winning lines
+
+        # --- COUNTERS ---
+        self.playouts = 0
+        self.iterations = 0
+        self.reused = 0  # visits already in the tree when a search started
+
+    # --- ROLLOUTS ---
+
+    def rollouts(self, board, n):
+        # winners (1, 2 or 0 for a draw) of n random games from the board, all played at once
+        cells = board.cells
+        squares = np.zeros(cells, dtype=np.int8)
+        for idx, player in board.stack:
+            squares[idx] = player
+        empty = np.flatnonzero(squares == 0)
+        mover = board.marked_sqrs % 2 + 1
+
+        # random time of every empty square, marks already on the board have time -1
+        times = np.full((n, cells), -1, dtype=np.int32)
+        times[:, empty] = self.rng.random((n, len(empty))).argsort(axis=1).argsort(axis=1)
+        owners = np.broadcast_to(squares, (n, cells)).copy()
+        owners[:, empty] = np.where(times[:, empty] % 2 == 0, mover, 3 - mover)
+
+        line_owners = owners[:, self.lines]  # (n, lines, k)
+        owned = (line_owners == line_owners[:, :, :1]).all(axis=2)
+        done = np.where(owned, times[:, self.lines].max(axis=2), cells)  # cells: never completed
+        first = done.argmin(axis=1)
+        rows = np.arange(n)
+        return np.where(done[rows, first] < cells, line_owners[rows, first, 0], 0)
+
+    # --- SEARCH ---
+
+    def start(self, board):
+        # reuse the subtree of the new position, or start a new tree
+        stack = tuple(board.stack)
+        shape = (board.rows, board.cols, board.k)
+        node = None
+        if self.root is not None and shape == self.shape and stack[:len(self.root_stack)] == self.root_stack:
+            node = self.root
+            for idx, player in stack[len(self.root_stack):]:
+                node = node.children.get(board.sqrs[idx])
+                if node is None:
+                    break
+        if node is None:
+            node = Node(None, None, 3 - (board.marked_sqrs % 2 + 1))
+        if shape != self.shape:
+            self.shape, self.lines = shape, np.array(board.lines)
+        node.parent = None
+        self.root, self.root_stack = node, stack
+        self.reused += node.visits
+
+    def iterate(self, board):
+        node = self.root
+        stack_len = len(board.stack)
+        stats = self.stats
+        if stats is not None:
+            stats.node(board)
+
+        # selection: follow UCT while every move of the node has been tried
+        while node.untried is not None and not node.untried and node.children:
+            node = node.uct_child(self.exploration)
+            board.push(*node.move, node.player)
+            if stats is not None:
+                stats.node(board)
+
+        # expansion: one new child, unless the game is over here
+        if not board.final_state() and not board.isfull():
+            if node.untried is None:
+                node.untried = board.get_empty_sqrs()
+                self.rng.shuffle(node.untried)
+            move = node.untried.pop()
+            player = 3 - node.player
+            child = Node(node, move, player)
+            node.children[move] = child
+            board.push(*move, player)
+            node = child
+            if stats is not None:
+                stats.node(board)
+
+        # simulation
+        winner = board.final_state()
+        if winner or board.isfull():
+            winners = np.full(self.batch, winner)
+        else:
+            winners = self.rollouts(board, self.batch)
+            if stats is not None:
+                stats.leaf()
+        wins = {1: np.count_nonzero(winners == 1), 2: np.count_nonzero(winners == 2)}
+        draws = self.batch - wins[1] - wins[2]
+        self.playouts += self.batch
+        self.iterations += 1
+
+        # backpropagation
+        while node is not None:
+            node.visits += self.batch
+            node.wins += wins[node.player] + draws / 2
+            node = node.parent
+        while len(board.stack) > stack_len:
+            board.pop()
+
+    def best_move(self, board, seconds=None, playouts=None):
+        # (win rate of the move for the player to move, move) after the time or playout budget
+        if seconds is None and playouts is None:
+            raise ValueError("MCTS needs a time (seconds) or a playout budget")
+        self.start(board)
+        if self.stats is not None:
+            self.stats.start(board)
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        limit = None if playouts is None else self.playouts + playouts
+        while True:
+            self.iterate(board)
+            if limit is not None and self.playouts >= limit:
+                break
+            if deadline is not None and time.perf_counter() >= deadline:
+                break
+        if self.stats is not None:
+            self.stats.finish()
+
+        # the most visited move is the most trusted one
+        best = max(self.root.children.values(), key=lambda child: child.visits)
+        return float(best.wins / best.visits), best.move
+
+    def __str__(self):
+        return (f"MCTS playouts: {self.playouts} iterations: {self.iterations} "
+                f"tree: {self.root.visits if self.root else 0} visits at the root ({self.reused} reused)")
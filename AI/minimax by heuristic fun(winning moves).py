@@ -1,5 +1,12 @@
-import tkinter as tk
-from tkinter import messagebox
+# the window needs tkinter, it is imported when the window is made so get_ai_move works without it
+tk = messagebox = None
+
+
+def init_ui():
+    global tk, messagebox
+    import tkinter as tk
+    from tkinter import messagebox
+
 
 class SearchSpaceStats:
     def __init__(self):
@@ -66,9 +73,92 @@ def evaluate_board(board, stats):
     winning_moves_score = evaluate_winning_moves(board, 'O', stats)  # AI is 'O'
     return winning_moves_score
 
+def get_ai_move(board, stats, player='O', search_stats=None):
+    # AI's move using the minimax algorithm with alpha-beta pruning
+    # board is a list of 9 squares (' ', 'X' or 'O'), player is the mark of the AI
+    # search_stats: a stats.SearchStats to fill with this search, None to not keep one
+    best_score = float('-inf')
+    best_move = None
+
+    alpha = float('-inf')
+    beta = float('inf')
+
+    if search_stats is not None:
+        search_stats.start()
+        search_stats.visit(0, False)
+    for child, move in enumerate(get_possible_moves(board)):
+        board[move] = player  # Assume AI makes the move
+        stats.nodes_explored_with_pruning += 1
+        score = minimax(board, 0, False, alpha, beta, stats, player, search_stats)
+        board[move] = ' '  # Undo the move
+
+        if score > best_score:
+            best_score = score
+            best_move = move
+
+        alpha = max(alpha, best_score)
+        if beta <= alpha:
+            if search_stats is not None:
+                search_stats.cutoff(child)
+            break  # Beta cut-off
+    if search_stats is not None:
+        search_stats.interior(child + 1)
+        search_stats.finish()
+
+    return best_move
+
+def minimax(board, depth, is_maximizing, alpha, beta, stats, player='O', search_stats=None):
+    # Minimax algorithm with alpha-beta pruning, scores are for the AI (player)
+    opponent = 'X' if player == 'O' else 'O'
+    if search_stats is not None:
+        # depth 0 is one move below the root
+        search_stats.visit(depth + 1, check_winner(board, 'X') or check_winner(board, 'O') or ' ' not in board)
+    if check_winner(board, opponent):  # Human wins
+        return -1
+    elif check_winner(board, player):  # AI wins
+        return 1
+    elif ' ' not in board:  # Tie
+        return 0
+
+    if is_maximizing:
+        max_eval = float('-inf')
+        for child, move in enumerate(get_possible_moves(board)):
+            board[move] = player
+            stats.nodes_explored_with_pruning += 1
+            eval = minimax(board, depth + 1, False, alpha, beta, stats, player, search_stats)
+            max_eval = max(max_eval, eval)
+            board[move] = ' '  # Undo the move
+
+            alpha = max(alpha, max_eval)
+            if beta <= alpha:
+                if search_stats is not None:
+                    search_stats.cutoff(child)
+                break  # Alpha cut-off
+        if search_stats is not None:
+            search_stats.interior(child + 1)
+        return max_eval
+    else:
+        min_eval = float('inf')
+        for child, move in enumerate(get_possible_moves(board)):
+            board[move] = opponent
+            stats.nodes_explored_with_pruning += 1
+            eval = minimax(board, depth + 1, True, alpha, beta, stats, player, search_stats)
+            min_eval = min(min_eval, eval)
+            board[move] = ' '  # Undo the move
+
+            beta = min(beta, min_eval)
+            if beta <= alpha:
+                if search_stats is not None:
+                    search_stats.cutoff(child)
+                break  # Beta cut-off
+        if search_stats is not None:
+            search_stats.interior(child + 1)
+        return min_eval
+
 class TicTacToeGUI:
-    def __init__(self, stats):
-        self.root = tk.Tk()
+    # root: the window to play in (main.py gives one of its own), None for a new one
+    def __init__(self, stats, root=None):
+        self.root = tk.Tk() if root is None else root
         self.root.title("Tic-Tac-Toe")
         self.stats = stats  # Search space statistics
 
@@ -117,64 +207,7 @@ class TicTacToeGUI:
                         self.current_player = 'X'
 
     def get_ai_move(self):
-        # AI's move using the minimax algorithm with alpha-beta pruning
-        best_score = float('-inf')
-        best_move = None
-
-        alpha = float('-inf')
-        beta = float('inf')
-
-        for move in get_possible_moves(self.board):
-            self.board[move] = 'O'  # Assume AI makes the move
-            self.stats.nodes_explored_with_pruning += 1
-            score = self.minimax(self.board, 0, False, alpha, beta)
-            self.board[move] = ' '  # Undo the move
-
-            if score > best_score:
-                best_score = score
-                best_move = move
-
-            alpha = max(alpha, best_score)
-            if beta <= alpha:
-                break  # Beta cut-off
-
-        return best_move
-
-    def minimax(self, board, depth, is_maximizing, alpha, beta):
-        # Minimax algorithm with alpha-beta pruning
-        if check_winner(board, 'X'):  # Human wins
-            return -1
-        elif check_winner(board, 'O'):  # AI wins
-            return 1
-        elif ' ' not in board:  # Tie
-            return 0
-
-        if is_maximizing:
-            max_eval = float('-inf')
-            for move in get_possible_moves(board):
-                board[move] = 'O'
-                self.stats.nodes_explored_with_pruning += 1
-                eval = self.minimax(board, depth + 1, False, alpha, beta)
-                max_eval = max(max_eval, eval)
-                board[move] = ' '  # Undo the move
-
-                alpha = max(alpha, max_eval)
-                if beta <= alpha:
-                    break  # Alpha cut-off
-            return max_eval
-        else:
-            min_eval = float('inf')
-            for move in get_possible_moves(board):
-                board[move] = 'X'
-                self.stats.nodes_explored_with_pruning += 1
-                eval = self.minimax(board, depth + 1, True, alpha, beta)
-                min_eval = min(min_eval, eval)
-                board[move] = ' '  # Undo the move
-
-                beta = min(beta, min_eval)
-                if beta <= alpha:
-                    break  # Beta cut-off
-            return min_eval
+        return get_ai_move(self.board, self.stats)
 
     def reset_game(self):
         # Reset the board and buttons for a new game
@@ -187,11 +220,13 @@ class TicTacToeGUI:
     def run(self):
         self.root.mainloop()
 
-# Create an instance of the TicTacToeGUI class and run the game
-search_stats = SearchSpaceStats()
-tic_tac_toe_game = TicTacToeGUI(search_stats)
-tic_tac_toe_game.run()
+if __name__ == "__main__":
+    init_ui()
+    # Create an instance of the TicTacToeGUI class and run the game
+    search_stats = SearchSpaceStats()
+    tic_tac_toe_game = TicTacToeGUI(search_stats)
+    tic_tac_toe_game.run()
 
-# After the game is finished, print the search space statistics
-print("Nodes Explored with Pruning:", search_stats.nodes_explored_with_pruning)
+    # After the game is finished, print the search space statistics
+    print("Nodes Explored with Pruning:", search_stats.nodes_explored_with_pruning)
 
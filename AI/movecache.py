@@ -0,0 +1,104 @@
+# answers of the move server (server.py) for the positions many games reach at the same time
+# the server keys an answer by the canonical position (canonical.py), so the symmetric copies of an
+# opening share one entry, and maps the move back onto the board of every request
+#
+# fetch(key, search):
+#   a fresh answer in the cache is returned at once ('hit')
+#   a request for a key that is already being searched waits for that search ('coalesced')
+#   anything else runs search() once and keeps its answer ('miss')
+# the cache is an LRU with a time to live and a memory cap: the least recently used answers are
+# dropped once their sizes add up to more than max_bytes, and an answer older than ttl seconds
+# is searched again
+
+import asyncio
+import json
+import time
+from collections import OrderedDict
+
+DEFAULT_BYTES = 64 * 1024 * 1024
+DEFAULT_TTL = 60.0
+ENTRY_BYTES = 400  # rough size of the key, the dict slot and the tuple of an entry, the answer is added
+
+
+class MoveCache:
+
+    def __init__(self, max_bytes=DEFAULT_BYTES, ttl=DEFAULT_TTL):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.entries = OrderedDict()  # key -> (expires, size, answer), least recently used first
+        self.flights = {}  # key -> future of the search that is running for it
+        self.bytes = 0
+
+        # --- COUNTERS ---
+        self.hits = 0
+        self.coalesced = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        if time.monotonic() >= entry[0]:
+            self.drop(key)
+            self.expired += 1
+            return None
+        self.entries.move_to_end(key)
+        return entry[2]
+
+    def put(self, key, answer):
+        size = ENTRY_BYTES + len(json.dumps(answer))
+        if key in self.entries:
+            self.drop(key)
+        if size > self.max_bytes or self.ttl <= 0:
+            return
+        self.entries[key] = (time.monotonic() + self.ttl, size, answer)
+        self.bytes += size
+        while self.bytes > self.max_bytes:
+            self.drop(next(iter(self.entries)))
+            self.evicted += 1
+
+    def drop(self, key):
+        self.bytes -= self.entries.pop(key)[1]
+
+    async def fetch(self, key, search):
+        # (answer, 'hit' / 'coalesced' / 'miss'), the answer is shared: callers must not change it
+        answer = self.get(key)
+        if answer is not None:
+            self.hits += 1
+            return answer, 'hit'
+        if key in self.flights:
+            self.coalesced += 1
+            # shielded: a waiter that goes away does not cancel the search of the others
+            return await asyncio.shield(self.flights[key]), 'coalesced'
+
+        self.misses += 1
+        flight = asyncio.get_running_loop().create_future()
+        self.flights[key] = flight
+        try:
+            answer = await search()
+        except asyncio.CancelledError:
+            flight.cancel()
+            raise
+        except Exception as error:
+            flight.set_exception(error)
+            flight.exception()  # the waiters get it, there may be none
+            raise
+        else:
+            flight.set_result(answer)
+            self.put(key, answer)
+        finally:
+            del self.flights[key]
+        return answer, 'miss'
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+    def __str__(self):
+        requests = self.hits + self.coalesced + self.misses
+        saved = (self.hits + self.coalesced) / requests if requests else 0.0
+        return (f"move cache requests: {requests} hits: {self.hits} coalesced: {self.coalesced} "
+                f"searches: {self.misses} ({saved:.1%} saved) entries: {len(self.entries)} "
+                f"bytes: {self.bytes} expired: {self.expired} evicted: {self.evicted}")
@@ -0,0 +1,89 @@
+# move ordering for the alpha-beta searches
+# alpha-beta cuts more when the best move is searched first, so the moves of a node are sorted:
+#   1. the move stored in the transposition table for this position
+#   2. moves that win on the spot, then moves that block a win of the opponent (like bfs_move)
+#   3. killer moves: moves that caused a cutoff in another position with the same number of marks
+#   4. the rest by history score: how often (and how deep) the move caused cutoffs anywhere
+# ties keep the order the moves came in, so with every feature off the search is unchanged
+# first child cutoffs / cutoffs tells how good the ordering is (1.0 is a perfectly ordered tree)
+
+FEATURES = ('tt', 'threats', 'killers', 'history')
+KILLERS = 2  # killer moves kept per ply
+
+TT_MOVE, WIN, BLOCK, KILLER = 4, 3, 2, 1
+
+
+class MoveOrdering:
+
+    def __init__(self, features=FEATURES):
+        features = tuple(features or ())
+        for feature in features:
+            if feature not in FEATURES:
+                raise ValueError(f"unknown move ordering {feature!r} (use some of {FEATURES})")
+        self.features = features
+        self.killers = {}  # number of marks -> killer moves
+        self.history = {}  # (player, move) -> score
+
+        # --- COUNTERS ---
+        self.cutoffs = 0
+        self.first_cutoffs = 0  # cutoffs by the first child searched
+
+    def new_search(self):
+        # killers belong to one search, the history is kept but halved so old moves fade out
+        self.killers = {}
+        self.history = {key: score // 2 for key, score in self.history.items() if score > 1}
+
+    def order(self, board, moves, player, tt_move=None):
+        if not self.features:
+            return moves
+
+        use_threats = 'threats' in self.features
+        use_history = 'history' in self.features
+        killers = self.killers.get(board.marked_sqrs, ()) if 'killers' in self.features else ()
+        if 'tt' not in self.features:
+            tt_move = None
+
+        k1 = board.k - 1
+        mine, theirs = board.counts[player], board.counts[player % 2 + 1]
+
+        def key(move):
+            rank = 0
+            if move == tt_move:
+                rank = TT_MOVE
+            elif use_threats and self.completes(board, move, mine, theirs, k1):
+                rank = WIN
+            elif use_threats and self.completes(board, move, theirs, mine, k1):
+                rank = BLOCK
+            elif move in killers:
+                rank = KILLER
+            return -rank, -self.history.get((player, move), 0) if use_history else 0
+
+        return sorted(moves, key=key)
+
+    def completes(self, board, move, counts, other_counts, k1):
+        # a mark on move completes a line that already has k-1 of these marks and none of the other player
+        for line in board.cell_lines[move[0] * board.cols + move[1]]:
+            if counts[line] == k1 and not other_counts[line]:
+                return True
+        return False
+
+    def cutoff(self, board, move, player, depth, child):
+        # move caused a beta cutoff as the child-th move (0 = first) of the node, depth moves from the end
+        self.cutoffs += 1
+        if child == 0:
+            self.first_cutoffs += 1
+
+        if 'killers' in self.features:
+            killers = self.killers.setdefault(board.marked_sqrs, [])
+            if move not in killers:
+                killers.insert(0, move)
+                del killers[KILLERS:]
+        if 'history' in self.features:
+            self.history[(player, move)] = self.history.get((player, move), 0) + depth * depth
+
+    def first_cutoff_rate(self):
+        return self.first_cutoffs / self.cutoffs if self.cutoffs else 0.0
+
+    def __str__(self):
+        return (f"ordering {'+'.join(self.features) or 'none'} cutoffs: {self.cutoffs} "
+                f"first child: {self.first_cutoffs} ({self.first_cutoff_rate():.1%})")
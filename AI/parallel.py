@@ -0,0 +1,182 @@
+# parallel root splitting: the moves of the root are searched by a pool of worker processes
+# young brothers wait: the first (most promising) root move is searched alone, its score is the
+# alpha bound its brothers start with, then all the other root moves are searched at the same time
+# the best root score so far is shared by all workers in one multiprocessing.Value, a worker
+# reads it when it starts a move and raises it when it finds a better move
+#
+# a move is searched with the window (alpha - 1, inf), so every move that can tie the best one gets
+# its exact score, and the merge keeps the lowest (row, col) of the best moves, the same rule as the
+# root of Searcher.best_move
+# every worker keeps its table for the whole best_move, so each depth starts from the entries of
+# the ones before; like in Searcher.best_move an entry of a deeper search can change a score, so
+# with more than one worker a score can depend on which worker searched the move
+# a node budget is split between the workers, a worker stops the depth when it has used its share
+
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, TimeoutError
+
+from bitboard import Board
+from ordering import MoveOrdering, FEATURES
+from search import Budget, Searcher, SearchTimeout, INF, WIN, iterative_deepening
+from stats import SearchStats
+from transposition import TranspositionTable, DEFAULT_BYTES
+
+# --- WORKER PROCESS ---
+
+_alpha = None  # best root score of the running search, shared by all workers
+_stop = None  # set by the main process when the move is out of time
+_searcher = None
+_search = None  # number of the best_move the worker's table and budget belong to
+
+
+class StopCheck(Budget):
+    # Searcher budget of a worker: its share of the move's nodes, and the stop flag of the main process
+
+    def check(self, nodes):
+        super().check(nodes)
+        if self.checks & 63 == 0 and _stop.value:
+            raise SearchTimeout
+
+
+def init_worker(alpha, stop, tt_bytes, ordering, stats):
+    global _alpha, _stop, _searcher
+    _alpha, _stop = alpha, stop
+    _searcher = Searcher(TranspositionTable(tt_bytes), MoveOrdering(ordering), stats=SearchStats() if stats else None)
+
+
+def search_move(stack, rows, cols, k, search, share, move, depth, first):
+    # (score of one root move for the player to move at the root, nodes, SearchStats.as_dict() or None)
+    # the score is None when the search was stopped
+    if _stop.value:
+        return None, 0, None
+
+    board = Board(rows, cols, k)
+    for idx, player in stack:
+        board.push(*divmod(idx, cols), player)
+    player = board.marked_sqrs % 2 + 1
+
+    global _search
+    if search != _search:
+        # the first move of a new best_move: a fresh table and the worker's share of the node budget
+        _search = search
+        _searcher.tt.clear()
+        _searcher.ordering.new_search()
+        _searcher.budget = StopCheck(None, share)
+        _searcher.budget.start(_searcher.nodes)
+    stats = _searcher.stats
+    if stats is not None:
+        stats.start(board, _searcher.tt)  # before the move, so the plies count from the root
+    board.push(*move, player)
+    nodes = _searcher.nodes
+    alpha = -INF if first else _alpha.value
+    try:
+        score = -_searcher.negamax(board, depth - 1, -INF, -(alpha - 1))[0]
+    except SearchTimeout:
+        score = None
+    if stats is not None:
+        stats.finish()
+    if score is None:
+        return None, _searcher.nodes - nodes, stats and stats.as_dict()
+
+    with _alpha.get_lock():
+        if score > _alpha.value:
+            _alpha.value = score
+    return score, _searcher.nodes - nodes, stats and stats.as_dict()
+
+
+def ready(_):
+    # started workers answer, so the pool start-up is not timed with the first move
+    return os.getpid()
+
+
+# --- MAIN PROCESS ---
+
+class ParallelSearcher:
+
+    def __init__(self, workers=None, tt_bytes=DEFAULT_BYTES, ordering=FEATURES, stats=None):
+        self.workers = workers or os.cpu_count() or 1
+        self.stats = stats  # SearchStats of the last search, the workers' searches added up, None to not keep any
+        self.tt_bytes = tt_bytes
+        self.ordering = ordering
+        self.alpha = multiprocessing.Value('q', -INF)
+        self.stop = multiprocessing.Value('b', 0)
+        self.pool = None
+        self.searches = 0  # best_move calls, a worker clears its table when a new one starts
+        self.share = None  # nodes every worker may search in this best_move, None for no limit
+        self.nodes = 0
+
+    def start(self):
+        # the pool is started on the first search and kept for the next moves
+        if self.pool is None:
+            self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker,
+                                            initargs=(self.alpha, self.stop, self.tt_bytes, self.ordering,
+                                                      self.stats is not None))
+            list(self.pool.map(ready, range(self.workers)))
+
+    def close(self):
+        if self.pool is not None:
+            self.pool.shutdown()
+            self.pool = None
+
+    def search_root(self, board, depth, deadline=None):
+        # (score for the player to move, best move) of a depth moves deep search
+        self.start()
+        player = board.marked_sqrs % 2 + 1
+        moves = MoveOrdering(self.ordering).order(board, board.get_empty_sqrs(), player)
+        task = (list(board.stack), board.rows, board.cols, board.k, self.searches, self.share)
+        self.alpha.value = -INF
+        self.stop.value = 0
+
+        scores = self.collect([self.pool.submit(search_move, *task, moves[0], depth, True)], deadline)
+        scores += self.collect([self.pool.submit(search_move, *task, move, depth, False) for move in moves[1:]],
+                               deadline)
+
+        best = 0
+        for i, score in enumerate(scores):
+            if score > scores[best] or (score == scores[best] and moves[i] < moves[best]):
+                best = i
+        return scores[best], moves[best]
+
+    def collect(self, futures, deadline):
+        # scores of the futures in order, SearchTimeout when the deadline comes first
+        scores = []
+        for i, future in enumerate(futures):
+            timeout = None if deadline is None else max(0.0, deadline - time.perf_counter())
+            try:
+                score = self.count(future.result(timeout))
+            except TimeoutError:
+                self.stop.value = 1  # the worker sees the flag and returns
+                score = self.count(future.result())
+            if score is None:
+                # out of time: stop the other workers and wait until the pool is idle again
+                self.stop.value = 1
+                for rest in futures[i + 1:]:
+                    self.count(rest.result())
+                raise SearchTimeout
+            scores.append(score)
+        return scores
+
+    def count(self, result):
+        # adds the nodes and stats of a worker's search, returns its score
+        score, nodes, counts = result
+        self.nodes += nodes
+        if counts is not None:
+            self.stats.add(counts)
+        return score
+
+    def best_move(self, board, seconds=None, nodes=None, max_depth=None):
+        # iterative deepening of the parallel root search, returns (score, move, depth reached)
+        # nodes: budget of the move, every worker gets an equal share of it
+        deadline = None if seconds is None else time.perf_counter() + seconds
+        self.searches += 1
+        self.share = None if nodes is None else max(nodes // self.workers, 1)
+        if self.stats is not None:
+            self.stats.start(board)
+        try:
+            return iterative_deepening(lambda depth, alpha, beta: self.search_root(board, depth, deadline),
+                                       board, None, None, max_depth, decisive=WIN, stats=self.stats)
+        finally:
+            if self.stats is not None:
+                self.stats.finish()
@@ -0,0 +1,135 @@
+# retrograde solver: solves every reachable position of a small board with NumPy, one level
+# (number of marks) at a time instead of one node at a time
+#   1. forward: expand level m to level m+1 as arrays of base-3 ranks (the same rank as solved.py)
+#   2. terminal positions of a whole level are found at once with batch.final_states
+#   3. backward: from the last level to the first, the value of a position is the best child value
+# values are for player 1 like AI.minimax (1, -1, 0) and the best move is the first best square in
+# row-major order, so the tables are the same ones AI.minimax would give node by node
+#
+#   python retrograde.py --size 4 --k 3    -> writes solved_4x4x3.bin for solved.py / AI level 3
+
+import argparse
+import os
+import time
+
+import numpy as np
+
+from batch import final_states, ONGOING
+from rules import get_rules
+import solved
+
+
+class Level:
+
+    def __init__(self, ranks):
+        self.ranks = ranks  # sorted int64 ranks of the positions with this many marks
+        self.values = None  # int8 value for player 1
+        self.moves = None  # int8 best square index, -1 for terminal positions
+
+
+def decode(ranks, cells):
+    # (N,) ranks -> (N, cells) int8 squares (0 empty, 1 player 1, 2 player 2)
+    pow3 = 3 ** np.arange(cells, dtype=np.int64)
+    return (ranks[:, None] // pow3 % 3).astype(np.int8)
+
+
+def solve(rows=3, cols=3, k=3, verbose=False):
+    rules = get_rules(cols, rows, k)
+    cells = rules.cells
+    pow3 = 3 ** np.arange(cells, dtype=np.int64)
+
+    # --- FORWARD: reachable positions, level by level ---
+    levels = [Level(np.zeros(1, dtype=np.int64))]
+    for marks in range(cells):
+        ranks = levels[marks].ranks
+        squares = decode(ranks, cells)
+        open_positions = final_states(squares, rows, cols, k) == ONGOING
+        ranks, squares = ranks[open_positions], squares[open_positions]
+
+        player = marks % 2 + 1
+        children = [ranks[squares[:, idx] == 0] + player * pow3[idx] for idx in range(cells)]
+        levels.append(Level(np.unique(np.concatenate(children))))
+        if verbose:
+            print(f"level {marks + 1}: {len(levels[-1].ranks)} positions")
+
+    # --- BACKWARD: values from the full boards up to the empty one ---
+    for marks in range(cells, -1, -1):
+        level = levels[marks]
+        squares = decode(level.ranks, cells)
+        states = final_states(squares, rows, cols, k)
+        values = np.where(states == 1, 1, np.where(states == 2, -1, 0)).astype(np.int8)
+        moves = np.full(len(level.ranks), -1, dtype=np.int8)
+
+        if marks < cells:
+            player = marks % 2 + 1
+            below = levels[marks + 1]
+            open_positions = np.flatnonzero(states == ONGOING)
+            best = np.full(len(open_positions), -2 if player == 1 else 2, dtype=np.int8)
+            best_move = np.full(len(open_positions), -1, dtype=np.int8)
+            for idx in range(cells):
+                empty = squares[open_positions, idx] == 0
+                child = np.searchsorted(below.ranks, level.ranks[open_positions[empty]] + player * pow3[idx])
+                child_values = below.values[child]
+                # strictly better only, so ties keep the first square in row-major order
+                better = child_values > best[empty] if player == 1 else child_values < best[empty]
+                rows_better = np.flatnonzero(empty)[better]
+                best[rows_better] = child_values[better]
+                best_move[rows_better] = idx
+            values[open_positions] = best
+            moves[open_positions] = best_move
+
+        level.values, level.moves = values, moves
+
+    return levels
+
+
+def to_table(levels):
+    # {rank: (value, best square index or None)}, the same shape as solved.solve()
+    table = {}
+    for level in levels:
+        for r, value, move in zip(level.ranks.tolist(), level.values.tolist(), level.moves.tolist()):
+            table[r] = (value, None if move < 0 else move)
+    return table
+
+
+def write(path, rows, cols, k, levels):
+    # same file as solved.write(), filled with array operations
+    positions = 3 ** (rows * cols)
+    codes = np.zeros((positions + 3) // 4 * 4, dtype=np.uint8)
+    moves = np.full(positions, solved.NO_MOVE, dtype=np.uint8)
+    code_of = np.array([solved.DRAW, solved.WIN, solved.LOSS], dtype=np.uint8)  # indexed by value (-1 wraps)
+    for level in levels:
+        codes[level.ranks] = code_of[level.values]
+        has_move = level.moves >= 0
+        moves[level.ranks[has_move]] = level.moves[has_move]
+    codes = codes.reshape(-1, 4)
+    packed = codes[:, 0] | codes[:, 1] << 2 | codes[:, 2] << 4 | codes[:, 3] << 6
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(solved.HEADER.pack(solved.MAGIC, solved.VERSION, rows, cols, k))
+        f.write(packed.astype(np.uint8).tobytes())
+        f.write(moves.tobytes())
+    os.replace(tmp, path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='solve a small board level by level and write the lookup file')
+    parser.add_argument('--size', type=int, default=4)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    levels = solve(args.size, args.size, args.k, verbose=True)
+    total = sum(len(level.ranks) for level in levels)
+    print(f"solved {total} positions in {time.perf_counter() - start:.1f}s, "
+          f"value of the empty board: {levels[0].values[0]}")
+
+    path = args.out or solved.default_path(args.size, args.size, args.k)
+    write(path, args.size, args.size, args.k, levels)
+    print(f"wrote {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+# rules of an m x n x k game: a width x height grid where k marks in a row win
+# every table the boards and searches need is built once per geometry and shared
+
+from functools import lru_cache
+
+
+class Rules:
+
+    def __init__(self, width=3, height=3, k=3):
+        if k < 1 or k > max(width, height):
+            raise ValueError(f"win length {k} does not fit a {width}x{height} board")
+
+        self.width = width
+        self.height = height
+        self.k = k
+        self.cells = width * height
+        self.full_mask = (1 << self.cells) - 1
+        self.sqrs = [divmod(i, width) for i in range(self.cells)]  # index -> (row, col)
+
+        # every run of k squares (vertical, horizontal, desc diagonal, asc diagonal) as a tuple of indexes
+        lines = []
+        for dr, dc in ((1, 0), (0, 1), (1, 1), (1, -1)):
+            for row in range(height):
+                for col in range(width):
+                    end_row = row + dr * (k - 1)
+                    end_col = col + dc * (k - 1)
+                    if 0 <= end_row < height and 0 <= end_col < width:
+                        lines.append(tuple((row + dr * i) * width + col + dc * i for i in range(k)))
+        self.lines = lines
+        self.line_masks = [sum(1 << i for i in line) for line in lines]
+
+        # reverse index: for every square, the indexes of the lines going through it
+        through = [[] for _ in range(self.cells)]
+        for i, line in enumerate(lines):
+            for idx in line:
+                through[idx].append(i)
+        self.cell_lines = [tuple(line_ids) for line_ids in through]
+
+    def __repr__(self):
+        return f"Rules({self.width}, {self.height}, {self.k})"
+
+
+@lru_cache(maxsize=None)
+def get_rules(width=3, height=3, k=3):
+    return Rules(width, height, k)
@@ -0,0 +1,251 @@
+# iterative deepening: search 1 move deep, then 2, 3, ... until the budget (time or nodes) runs out
+# the move of the last depth that finished is always kept, so the AI can answer on time
+# every depth starts with an aspiration window around the previous score and only searches
+# again with the full window when the score falls outside it
+# a search that runs over the budget is stopped with SearchTimeout from inside the recursion,
+# the board is then popped back to where the search started
+#
+# Searcher is the negamax form of the alpha-beta search: one branch for both players, scores are
+# integers for the player to move. With pvs=True it is a Principal Variation Search: the first
+# move gets the full window, the others a null window that only proves they are not better,
+# and a move is searched again with the full window only when that proof fails
+# at the root of best_move the moves after the first are searched with the window lowered by one,
+# so a move that ties the best one gets its exact score, and of the tied moves the lowest (row, col)
+# is played: the move does not depend on the order the moves were searched in (parallel.py keeps
+# the same rule, so both pick the same move)
+# MTD(f) finds the score with null window searches only: every pass moves a lower or an upper
+# bound onto the guess until both meet, the table keeps the work of the earlier passes
+
+import time
+
+from ordering import MoveOrdering
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+
+WIN = 100000  # negamax score of a won position, plus the empty squares left so faster wins score more
+INF = 1 << 30
+ASPIRATION = 16  # aspiration window of the negamax searches, in line_score units
+
+
+class SearchTimeout(Exception):
+    pass
+
+
+class Budget:
+
+    def __init__(self, seconds=None, nodes=None):
+        self.seconds = seconds
+        self.nodes = nodes
+        self.deadline = None
+        self.node_limit = None
+        self.checks = 0
+
+    def start(self, nodes=0):
+        # nodes: the counter of the AI when the move starts (it keeps counting over the game)
+        self.deadline = None if self.seconds is None else time.perf_counter() + self.seconds
+        self.node_limit = None if self.nodes is None else nodes + self.nodes
+        self.checks = 0
+
+    def check(self, nodes):
+        # called on every node of the search, the clock is only read every 64 calls
+        if self.node_limit is not None and nodes >= self.node_limit:
+            raise SearchTimeout
+        self.checks += 1
+        if self.deadline is not None and self.checks & 63 == 0 and time.perf_counter() >= self.deadline:
+            raise SearchTimeout
+
+
+# --- HORIZON ---
+
+def line_score(board):
+    # every line only one player has marks on counts marks^2, positive for player 1
+    score = 0
+    x_counts, o_counts = board.counts[1], board.counts[2]
+    for line in range(len(board.lines)):
+        if not o_counts[line]:
+            score += x_counts[line] * x_counts[line]
+        elif not x_counts[line]:
+            score -= o_counts[line] * o_counts[line]
+    return score
+
+
+def horizon(board):
+    # score of a position where a depth limited search stops, for player 1 and always inside (-1, 1)
+    # so a real win or loss is worth more
+    return line_score(board) / (len(board.lines) * board.k * board.k)
+
+
+# --- DRIVER ---
+
+def iterative_deepening(search, board, budget=None, window=None, max_depth=None, decisive=1, first_depth=1,
+                        stats=None):
+    # search(depth, alpha, beta) -> (eval, move), a search of the board cut off after depth moves
+    # returns (eval, move, depth of the last finished search)
+    # decisive: a score that is a proven result, deeper searches will not change it
+    # stats: SearchStats that gets the time and nodes of every finished depth
+    stack_len = len(board.stack)
+    max_depth = board.cells - board.marked_sqrs if max_depth is None else max_depth
+    eval, move, done = None, None, 0
+
+    for depth in range(min(first_depth, max_depth), max_depth + 1):
+        try:
+            if window is None or eval is None:
+                result = search(depth, -float('inf'), float('inf'))
+            else:
+                alpha, beta = eval - window, eval + window
+                result = search(depth, alpha, beta)
+                if result[0] <= alpha or result[0] >= beta:
+                    # outside the window the score is only a bound, search again with the full window
+                    result = search(depth, -float('inf'), float('inf'))
+        except SearchTimeout:
+            while len(board.stack) > stack_len:
+                board.pop()
+            break
+
+        eval, move, done = result[0], result[1], depth
+        if stats is not None:
+            stats.iteration(depth)
+        if abs(eval) >= decisive:
+            break
+
+    if move is None:
+        # not even one move deep in the budget: any legal move is better than none
+        move = board.get_empty_sqrs()[0]
+    return eval, move, done
+
+
+# --- NEGAMAX / PVS ---
+
+class Searcher:
+
+    def __init__(self, tt=None, ordering=None, pvs=True, window=ASPIRATION, stats=None):
+        self.tt = tt if tt is not None else TranspositionTable()
+        self.ordering = ordering if ordering is not None else MoveOrdering()
+        self.pvs = pvs
+        self.window = window
+        self.budget = None
+        self.stats = stats  # SearchStats of the last search, None to not keep any
+        self.root_marks = -1  # marks on the board at the root of best_move, -1 outside of it
+
+        # --- COUNTERS ---
+        self.nodes = 0
+        self.researches = 0  # null window probes that failed high and were searched again
+        self.passes = 0  # MTD(f) null window searches
+        self.guess = 0  # score of the last MTD(f) search, the first guess for the next one
+
+    def negamax(self, board, depth, alpha, beta):
+        # (score for the player to move, best move), searching depth moves ahead
+        self.nodes += 1
+        if self.budget is not None:
+            self.budget.check(self.nodes)
+        stats = self.stats
+        if stats is not None:
+            stats.node(board)
+
+        left = board.cells - board.marked_sqrs
+        if board.final_state():
+            return -(WIN + left), None  # the last move won, so the player to move lost
+        if not left:
+            return 0, None
+        depth = min(depth, left)
+
+        alpha_orig = alpha
+        entry = self.tt.probe(board.hash)
+        tt_move = None
+        if entry is not None:
+            tt_score, flag, tt_depth, tt_move = entry
+            if tt_depth >= depth:
+                if flag == EXACT or (flag == LOWER and tt_score >= beta) or (flag == UPPER and tt_score <= alpha):
+                    return tt_score, tt_move
+
+        player = board.marked_sqrs % 2 + 1
+        if depth == 0:
+            if stats is not None:
+                stats.leaf()
+            score = line_score(board)
+            return (score if player == 1 else -score), None
+
+        best, best_move = -INF, None
+        root = board.marked_sqrs == self.root_marks
+        moves = self.ordering.order(board, board.get_empty_sqrs(), player, tt_move)
+        for child, (row, col) in enumerate(moves):
+            board.push(row, col, player)
+            lower = alpha - 1 if root and child else alpha  # a tie with the best root move gets its exact score
+            if child == 0 or not self.pvs:
+                score = -self.negamax(board, depth - 1, -beta, -lower)[0]
+            else:
+                score = -self.negamax(board, depth - 1, -lower - 1, -lower)[0]
+                if lower < score < beta:
+                    self.researches += 1
+                    score = -self.negamax(board, depth - 1, -beta, -lower)[0]
+            board.pop()
+
+            if score > best or (root and score == best and (row, col) < best_move):
+                best, best_move = score, (row, col)
+            if score > alpha:
+                alpha = score
+            if alpha >= beta:
+                self.ordering.cutoff(board, (row, col), player, depth, child)
+                if stats is not None:
+                    stats.cutoff(child)
+                break
+        if stats is not None:
+            stats.interior(child + 1)
+
+        if best <= alpha_orig:
+            flag = UPPER
+        elif best >= beta:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(board.hash, best, flag, depth, best_move)
+        return best, best_move
+
+    def mtdf(self, board, depth, guess):
+        # (score for the player to move, best move) from null window searches around guess
+        lower, upper = -INF, INF
+        score, move = guess, None
+        while lower < upper:
+            beta = score + 1 if score == lower else score
+            score, best_move = self.negamax(board, depth, beta - 1, beta)
+            self.passes += 1
+            if score < beta:
+                upper = score
+            else:
+                # only a pass that fails high proves its move reaches the score
+                lower = score
+                move = best_move
+        self.guess = score
+        return score, move
+
+    def best_move(self, board, budget=None, max_depth=None, mtdf=False, first_depth=1):
+        # iterative deepening of negamax, returns (score for the player to move, move, depth reached)
+        # with mtdf every depth is an MTD(f) search seeded with the score of two depths before
+        # (the horizon score swings between odd and even depths), the first ones with the last move's
+        self.ordering.new_search()
+        self.budget = budget
+        self.root_marks = board.marked_sqrs
+        if budget is not None:
+            budget.start(self.nodes)
+        if self.stats is not None:
+            self.stats.start(board, self.tt)
+        try:
+            if mtdf:
+                guesses = {}
+
+                def search(depth, alpha, beta):
+                    guess = guesses.get(depth - 2, guesses.get(depth - 1, self.guess))
+                    guesses[depth], move = self.mtdf(board, depth, guess)
+                    return guesses[depth], move
+
+                return iterative_deepening(search, board, budget, None, max_depth, WIN, first_depth, self.stats)
+            return iterative_deepening(lambda depth, alpha, beta: self.negamax(board, depth, alpha, beta),
+                                       board, budget, self.window, max_depth, WIN, first_depth, self.stats)
+        finally:
+            self.budget = None
+            self.root_marks = -1
+            if self.stats is not None:
+                self.stats.finish()
+
+    def __str__(self):
+        return (f"{'PVS' if self.pvs else 'alpha-beta'} nodes: {self.nodes} re-searches: {self.researches} "
+                f"MTD(f) passes: {self.passes}")
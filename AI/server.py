@@ -0,0 +1,339 @@
+# move server: the engines of engines.py for many games at once, from one process, run from the AI folder:
+#   python server.py                          -> listens on 127.0.0.1:7070
+#   python server.py --unix /tmp/tictactoe.sock
+# a request is one line of JSON, its answer is one line of JSON with the same id:
+#   {"id": 1, "board": [[1, 0, 0], [0, 2, 0], [0, 0, 0]], "k": 3, "to_move": 1, "engine": "pvs",
+#    "budget": {"move_time": 0.5, "node_limit": null}}
+#   {"id": 1, "move": [0, 2], "score": 0, "value": 0,
+#    "stats": {"nodes": 512, "seconds": 0.01, "worker": 4242, "total_seconds": 0.012}}
+# board: rows of 0 (empty), 1 and 2, player 1 moves first; k is 3, to_move the player the marks give and
+# budget --move-time / --node-limit when they are left out (null for no limit)
+# a budget for an engine that plays at once (random, bfs, winning, reduction) is an error, and so is a
+# search without any limit (both null) with more than FULL_SEARCH_SQUARES empty squares left
+# engine: one of engines.ENGINES, or 'solved' for a lookup in the solved positions file
+# score is the engine's own (see Engine.score), value the game value for the player to move
+# (1 win, 0 draw, -1 loss) from the solved positions file of the board size, null without one
+# a request that cannot be played gets {"id": ..., "error": "..."}
+#
+# the position of a request is searched in its canonical orientation (canonical.py) and the answer
+# is kept in a MoveCache (movecache.py) by engine, board size, canonical position and budget:
+# requests for a position (or a symmetric copy of it) that is being searched wait for that search,
+# and the next ones get the kept answer until it is --cache-ttl seconds old
+# stats.cache says which it was ('hit', 'coalesced', 'miss', or 'off' for the random engine), the
+# nodes and seconds are those of the search that made the answer
+#
+# the connections are served by one asyncio loop, the searches by a pool of worker processes
+# every worker keeps its engines between requests, one per engine, board size and player to move
+# (the tables of the game scripts are only right for the colours they were filled with)
+# the pvs and mtdf engines of all the workers share one transposition table per board size in
+# shared memory (lazysmp.py), the solved positions files are mmapped and read by the server itself
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import resource_tracker
+from itertools import zip_longest
+
+from bitboard import Board
+from canonical import get_symmetry
+from constants import MOVE_TIME
+from engines import ENGINES, PVSEngine, ScriptEngine, make_engine
+from lazysmp import SharedTranspositionTable
+from movecache import MoveCache, DEFAULT_BYTES as CACHE_BYTES, DEFAULT_TTL as CACHE_TTL
+from solved import default_path, get_table
+from transposition import DEFAULT_BYTES
+
+MAX_SIZE = 15  # the shared table stores a move as row and col in 4 bits each
+FULL_SEARCH_SQUARES = 9  # a search to the end of the game of a 3x3 board takes seconds, of more squares much longer
+UNCACHED = {'random'}  # engines whose answers are not kept, every request gets a new move
+
+
+# --- REQUESTS ---
+
+def read_board(request):
+    # the bitboard.Board of a request, its marks pushed in turn so the hash has the right player to move
+    grid = request.get('board')
+    if not isinstance(grid, list) or not grid or not all(isinstance(row, list) for row in grid) \
+            or any(len(row) != len(grid[0]) for row in grid):
+        raise ValueError("board must be a list of rows of the same length")
+    rows, cols = len(grid), len(grid[0])
+    if not 1 <= rows <= MAX_SIZE or not 1 <= cols <= MAX_SIZE:
+        raise ValueError(f"boards are 1x1 to {MAX_SIZE}x{MAX_SIZE}, not {rows}x{cols}")
+    k = request.get('k', 3)
+    if not isinstance(k, int) or not 1 <= k <= max(rows, cols):
+        raise ValueError(f"k must be a number from 1 to {max(rows, cols)}")
+
+    marks = {1: [], 2: []}
+    for row in range(rows):
+        for col in range(cols):
+            mark = grid[row][col]
+            if mark not in (0, 1, 2) or isinstance(mark, bool):
+                raise ValueError(f"square {(row, col)} is {mark!r}, not 0, 1 or 2")
+            if mark:
+                marks[mark].append((row, col))
+    if len(marks[1]) - len(marks[2]) not in (0, 1):
+        raise ValueError("player 1 moves first, so it has as many marks as player 2 or one more")
+    to_move = 1 if len(marks[1]) == len(marks[2]) else 2
+    if request.get('to_move', to_move) != to_move:
+        raise ValueError(f"the marks give player {to_move} to move")
+
+    board = Board(rows, cols, k)
+    for one, two in zip_longest(marks[1], marks[2]):
+        board.push(*one, 1)
+        if two is not None:
+            board.push(*two, 2)
+    if board.final_state() or board.isfull():
+        raise ValueError("the game is over")
+    return board, to_move
+
+
+def read_budget(request, move_time, node_limit):
+    budget = request.get('budget') or {}
+    if not isinstance(budget, dict):
+        raise ValueError("budget must be an object with move_time and/or node_limit")
+    move_time = budget.get('move_time', move_time)
+    node_limit = budget.get('node_limit', node_limit)
+    if move_time is not None and (not isinstance(move_time, (int, float)) or move_time <= 0):
+        raise ValueError("move_time must be a number of seconds above 0 or null")
+    if node_limit is not None and (not isinstance(node_limit, int) or node_limit <= 0):
+        raise ValueError("node_limit must be a number of nodes above 0 or null")
+    return move_time, node_limit
+
+
+# --- WORKER PROCESS ---
+
+_engines = {}  # (engine, rows, cols, k, player to move) -> Engine, kept between requests
+_tables = {}  # name -> SharedTranspositionTable of one board size
+
+
+def init_worker(quiet):
+    if quiet:
+        # the engines print every move
+        sys.stdout = open(os.devnull, 'w')
+
+
+def ready(_):
+    return os.getpid()
+
+
+def play(stack, rows, cols, k, name, move_time, node_limit, tt_name):
+    # the answer of one request, without its value
+    board = Board(rows, cols, k)
+    for idx, player in stack:
+        board.push(*divmod(idx, cols), player)
+
+    key = (name, rows, cols, k, board.marked_sqrs % 2)
+    engine = _engines.get(key)
+    if engine is None:
+        engine = _engines[key] = make_engine(name, board)
+        if isinstance(engine, PVSEngine):
+            if tt_name not in _tables:
+                _tables[tt_name] = SharedTranspositionTable(name=tt_name)
+            engine.searcher.tt = _tables[tt_name]
+    engine.set_budget(move_time, node_limit)
+
+    nodes = engine.nodes
+    start = time.perf_counter()
+    row, col = engine.move(board)
+    return {'move': [row, col], 'score': engine.score,
+            'stats': {'nodes': engine.nodes - nodes, 'seconds': round(time.perf_counter() - start, 6),
+                      'worker': os.getpid()}}
+
+
+# --- SERVER ---
+
+class MoveServer:
+
+    def __init__(self, workers=None, tt_bytes=DEFAULT_BYTES, move_time=MOVE_TIME, node_limit=None, quiet=True,
+                 cache_bytes=CACHE_BYTES, cache_ttl=CACHE_TTL):
+        self.workers = workers or os.cpu_count() or 1
+        self.pool = ProcessPoolExecutor(self.workers, initializer=init_worker, initargs=(quiet,))
+        self.tt_bytes = tt_bytes
+        self.move_time = move_time
+        self.node_limit = node_limit
+        self.tables = {}  # (rows, cols, k) -> SharedTranspositionTable of the pvs and mtdf engines
+        self.symmetries = {}  # (rows, cols) -> canonical.Symmetry
+        self.cache = MoveCache(cache_bytes, cache_ttl)
+        self.requests = 0
+
+    def start(self):
+        # the pool forks its workers on the first requests: a worker forked while a connection is open
+        # keeps a copy of its socket, and closing the connection would then never reach the client,
+        # so all of them are started before the server accepts connections
+        # the resource tracker is started first: the workers must share it to attach the shared tables
+        resource_tracker.ensure_running()
+        list(self.pool.map(ready, range(self.workers)))
+
+    def shared_table(self, board):
+        shape = (board.rows, board.cols, board.k)
+        if shape not in self.tables:
+            self.tables[shape] = SharedTranspositionTable(self.tt_bytes)
+        return self.tables[shape].name
+
+    def symmetry(self, board):
+        shape = (board.rows, board.cols)
+        if shape not in self.symmetries:
+            self.symmetries[shape] = get_symmetry(board.cols, board.rows)
+        return self.symmetries[shape]
+
+    def solved_table(self, board):
+        # only a file that is already there, building one would stop every other game
+        if not os.path.exists(default_path(board.rows, board.cols, board.k)):
+            return None
+        return get_table(board.rows, board.cols, board.k)
+
+    async def answer(self, request):
+        start = time.perf_counter()
+        board, to_move = read_board(request)
+        name = request.get('engine', 'pvs')
+        if name != 'solved' and name not in ENGINES:
+            raise ValueError(f"unknown engine {name!r} (use solved or one of {', '.join(ENGINES)})")
+        move_time, node_limit = read_budget(request, self.move_time, self.node_limit)
+        if name != 'solved':
+            engine = ENGINES[name]
+            if not engine.budgeted and request.get('budget'):
+                raise ValueError(f"{name} plays at once and has no budget, leave budget out")
+            left = board.cells - board.marked_sqrs
+            if engine.budgeted and issubclass(engine, (ScriptEngine, PVSEngine)) and move_time is None \
+                    and node_limit is None and left > FULL_SEARCH_SQUARES:
+                raise ValueError(f"{name} without move_time or node_limit searches to the end of the game, "
+                                 f"only allowed with at most {FULL_SEARCH_SQUARES} empty squares, not {left}")
+
+        value, best = None, None
+        table = self.solved_table(board)
+        if table is not None:
+            value, best = table.lookup(board)
+            if value is not None and to_move == 2:
+                value = -value
+
+        if name == 'solved':
+            if best is None:
+                raise ValueError(f"no solved positions file with this position for "
+                                 f"{board.rows}x{board.cols} k={board.k}")
+            answer = {'move': list(best), 'score': value, 'stats': {'nodes': 0, 'seconds': 0.0, 'worker': os.getpid()}}
+        else:
+            symmetry = self.symmetry(board)
+            key, t = symmetry.canonical(board)
+            stack = [(symmetry.perms[t][idx], player) for idx, player in board.stack]
+            tt_name = self.shared_table(board) if issubclass(ENGINES[name], PVSEngine) else None
+
+            async def search():
+                loop = asyncio.get_running_loop()
+                return await loop.run_in_executor(self.pool, play, stack, board.rows, board.cols, board.k, name,
+                                                  move_time, node_limit, tt_name)
+
+            if name in UNCACHED:
+                found, how = await search(), 'off'
+            else:
+                found, how = await self.cache.fetch((name, board.rows, board.cols, board.k, key, move_time,
+                                                     node_limit), search)
+            # the cached answer is shared, every request gets its own copy with the move on its board
+            answer = {'move': list(symmetry.from_canonical(t, tuple(found['move']))), 'score': found['score'],
+                      'stats': dict(found['stats'], cache=how)}
+        answer['value'] = value
+        answer['stats']['total_seconds'] = round(time.perf_counter() - start, 6)
+        return answer
+
+    async def reply(self, line, writer, lock):
+        self.requests += 1
+        answer = {'id': None}
+        try:
+            request = json.loads(line)
+            if not isinstance(request, dict):
+                raise ValueError("a request is a JSON object")
+            answer['id'] = request.get('id')
+            answer.update(await self.answer(request))
+        except ValueError as error:
+            answer['error'] = str(error)
+        except Exception as error:
+            answer['error'] = f"{type(error).__name__}: {error}"
+        async with lock:
+            writer.write(json.dumps(answer).encode() + b'\n')
+            await writer.drain()
+
+    async def handle(self, reader, writer):
+        # the requests of one connection are played at the same time, their answers come back as they finish
+        lock = asyncio.Lock()
+        tasks = set()
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                task = asyncio.create_task(self.reply(line, writer, lock))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+        for table in self.tables.values():
+            table.close()
+        self.tables.clear()
+
+
+async def listen(server, host=None, port=None, unix=None):
+    # the listening asyncio server, the workers are started first
+    server.start()
+    if unix is not None:
+        return await asyncio.start_unix_server(server.handle, unix)
+    return await asyncio.start_server(server.handle, host, port)
+
+
+async def serve(server, host=None, port=None, unix=None):
+    listener = await listen(server, host, port, unix)
+    where = unix if unix is not None else f"{host}:{port}"
+    print(f"serving moves on {where} with {server.workers} workers", flush=True)
+
+    # SIGTERM (and Ctrl-C) stop the server, so the shared tables are freed (Windows only has Ctrl-C)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except NotImplementedError:
+            pass
+    async with listener:
+        await stop.wait()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='answer move requests (one JSON object per line) over a socket')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=7070)
+    parser.add_argument('--unix', default=None, help='listen on this Unix socket instead of TCP')
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--tt-bytes', type=int, default=DEFAULT_BYTES,
+                        help='size of the shared table of every board size')
+    parser.add_argument('--move-time', type=float, default=MOVE_TIME,
+                        help='seconds per move of a request without a budget')
+    parser.add_argument('--node-limit', type=int, default=None, help='nodes per move of a request without a budget')
+    parser.add_argument('--cache-bytes', type=int, default=CACHE_BYTES, help='memory cap of the kept answers')
+    parser.add_argument('--cache-ttl', type=float, default=CACHE_TTL,
+                        help='seconds an answer is kept, 0 to only join the searches that are running')
+    parser.add_argument('--verbose', action='store_true', help='keep the output of the engines')
+    args = parser.parse_args()
+
+    server = MoveServer(args.workers, args.tt_bytes, args.move_time, args.node_limit, not args.verbose,
+                        args.cache_bytes, args.cache_ttl)
+    try:
+        asyncio.run(serve(server, args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(server.cache, flush=True)
+        server.close()
+        if args.unix is not None and os.path.exists(args.unix):
+            os.remove(args.unix)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,178 @@
+# solved positions: every reachable position of a small board with its minimax value and best move
+# stored in one file and read back with mmap, so a move is one lookup instead of a search
+#
+# file layout (little endian):
+#   header  magic 'TTTS', version, rows, cols, k              (8 bytes)
+#   values  2 bits per position, indexed by the base-3 rank   (ceil(3^cells / 4) bytes)
+#   moves   1 byte per position: best square index, 255=none  (3^cells bytes)
+# the rank of a position is sum(mark * 3^idx) with mark 0 empty, 1 player 1, 2 player 2
+#
+#   python solved.py --size 3          -> writes solved_3x3x3.bin next to this file
+#   python retrograde.py --size 4      -> same file for 4x4 boards (vectorised, much faster)
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+from functools import lru_cache
+
+from bitboard import Board
+
+MAGIC = b'TTTS'
+VERSION = 1
+HEADER = struct.Struct('<4sBBBB')
+
+# 2-bit outcome codes, values are for player 1 like AI.minimax (1 win, -1 loss, 0 draw)
+UNKNOWN, WIN, LOSS, DRAW = 0, 1, 2, 3
+CODE_VALUE = {WIN: 1, LOSS: -1, DRAW: 0}
+VALUE_CODE = {1: WIN, -1: LOSS, 0: DRAW}
+NO_MOVE = 255
+
+MAX_BUILD_CELLS = 9  # bigger boards take too long to solve on the first AI move, run retrograde.py for them
+
+
+def default_path(rows, cols, k):
+    return os.path.join(os.path.dirname(os.path.abspath(__file__)), f"solved_{rows}x{cols}x{k}.bin")
+
+
+@lru_cache(maxsize=None)
+def rank_tables(cells):
+    # rank_tables(cells)[chunk][byte] = sum of 3^idx over the set bits of that byte of a mask
+    tables = []
+    for chunk in range(0, cells, 8):
+        table = []
+        for byte in range(256):
+            table.append(sum(3 ** (chunk + bit) for bit in range(8) if byte >> bit & 1 and chunk + bit < cells))
+        tables.append(tuple(table))
+    return tuple(tables)
+
+
+def rank(board):
+    tables = rank_tables(board.cells)
+    x, o = board.masks[1], board.masks[2]
+    total = 0
+    for table in tables:
+        total += table[x & 0xFF] + 2 * table[o & 0xFF]
+        x >>= 8
+        o >>= 8
+    return total
+
+
+# --- GENERATOR ---
+
+def solve(rows=3, cols=3, k=3):
+    # minimax over every reachable position, returns {rank: (value, best square index or None)}
+    # ties keep the first best square in row-major order, the same move AI.minimax picks
+    board = Board(rows, cols, k)
+    table = {}
+    sys.setrecursionlimit(max(sys.getrecursionlimit(), 10 * board.cells))
+
+    def search(player):
+        r = rank(board)
+        if r in table:
+            return table[r][0]
+
+        case = board.final_state()
+        if case:
+            value, best = (1 if case == 1 else -1), None
+        elif board.isfull():
+            value, best = 0, None
+        else:
+            value, best = None, None
+            for (row, col) in board.get_empty_sqrs():
+                board.push(row, col, player)
+                eval = search(player % 2 + 1)
+                board.pop()
+                if value is None or (eval > value if player == 1 else eval < value):
+                    value, best = eval, row * cols + col
+
+        table[r] = (value, best)
+        return value
+
+    search(1)
+    return table
+
+
+def write(path, rows, cols, k, table):
+    # table: {rank: (value, best square index or None)}
+    positions = 3 ** (rows * cols)
+    values = bytearray((positions + 3) // 4)
+    moves = bytearray([NO_MOVE]) * positions
+    for r, (value, best) in table.items():
+        values[r >> 2] |= VALUE_CODE[value] << ((r & 3) * 2)
+        if best is not None:
+            moves[r] = best
+
+    tmp = path + '.tmp'
+    with open(tmp, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, rows, cols, k))
+        f.write(values)
+        f.write(moves)
+    os.replace(tmp, path)
+
+
+def build(rows=3, cols=3, k=3, path=None):
+    path = path or default_path(rows, cols, k)
+    write(path, rows, cols, k, solve(rows, cols, k))
+    return path
+
+
+# --- LOOKUP ---
+
+class SolvedTable:
+
+    def __init__(self, path):
+        with open(path, 'rb') as f:
+            self.mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.rows, self.cols, self.k = HEADER.unpack_from(self.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{path} is not a solved-position file")
+
+        self.cells = self.rows * self.cols
+        self.positions = 3 ** self.cells
+        self.values_at = HEADER.size
+        self.moves_at = self.values_at + (self.positions + 3) // 4
+
+    def lookup(self, board):
+        # (value for player 1, best (row, col) or None) of the position, value None if it was never reached
+        r = rank(board)
+        code = self.mm[self.values_at + (r >> 2)] >> ((r & 3) * 2) & 3
+        if code == UNKNOWN:
+            return None, None
+        best = self.mm[self.moves_at + r]
+        return CODE_VALUE[code], (None if best == NO_MOVE else divmod(best, self.cols))
+
+    def close(self):
+        self.mm.close()
+
+
+_tables = {}
+
+
+def get_table(rows=3, cols=3, k=3, path=None):
+    # open (and build the first time, on small boards) the solved file for this board size
+    # returns None when there is no file and the board is too big to solve here
+    path = path or default_path(rows, cols, k)
+    if path not in _tables:
+        if not os.path.exists(path):
+            if rows * cols > MAX_BUILD_CELLS:
+                return None
+            build(rows, cols, k, path)
+        _tables[path] = SolvedTable(path)
+    return _tables[path]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='solve every reachable position and write the lookup file')
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--out', default=None)
+    args = parser.parse_args()
+
+    path = build(args.size, args.size, args.k, args.out)
+    print(f"wrote {path} ({os.path.getsize(path)} bytes)")
+
+
+if __name__ == "__main__":
+    main()
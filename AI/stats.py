@@ -0,0 +1,135 @@
+# what one search did, for the AIs that are made with stats=True
+# a search without stats keeps None in its stats attribute and only tests it (like the budget),
+# so the searches that play the game pay one comparison per node for it
+#
+# the search calls, in this order:
+#   start(board, tt)    before the search (tt: its TranspositionTable, or None)
+#   node(board)         on every node, a finished game counts as a leaf
+#                       (visit(ply, over) for the searches of a list of squares instead of a Board)
+#   leaf()              on every position scored at the depth limit
+#   cutoff(child)       when the move at index child of the ordered moves cuts the node off
+#   interior(searched)  when a node is left after searching that many of its moves
+#   iteration(depth)    after every finished depth of iterative deepening
+#   finish()            after the search
+#
+# the searches in worker processes (parallel.py, lazysmp.py) keep their own SearchStats and send
+# back as_dict(), the main process adds them up with add()
+# MCTS (mcts.py) calls node on every position an iteration walks through and leaf on every
+# position it plays random games from, it has no depths, cutoffs or table
+
+import time
+
+
+class SearchStats:
+
+    def __init__(self):
+        self.start_marks = 0
+        self.start_time = 0.0
+        self.mark_time = 0.0  # end of the last iteration
+        self.mark_nodes = 0
+        self.tt = None
+        self.tt_start = (0, 0)
+        self.reset()
+
+    def reset(self):
+        self.nodes = 0
+        self.leaves = 0
+        self.max_depth = 0  # deepest ply below the root
+        self.cutoffs = {}  # index of the move in the ordered list -> cutoffs it made
+        self.branching = {}  # moves searched at a node -> nodes
+        self.iterations = []  # (depth, seconds, nodes) of every finished depth
+        self.tt_probes = 0
+        self.tt_hits = 0
+        self.seconds = 0.0
+
+    # --- CALLED BY THE SEARCH ---
+
+    def start(self, board=None, tt=None):
+        self.reset()
+        self.start_marks = board.marked_sqrs if board is not None else 0
+        self.start_time = self.mark_time = time.perf_counter()
+        self.mark_nodes = 0
+        self.tt = tt
+        if tt is not None:
+            self.tt_start = (tt.hits, tt.hits + tt.misses + tt.collisions)
+
+    def node(self, board):
+        self.nodes += 1
+        ply = board.marked_sqrs - self.start_marks
+        if ply > self.max_depth:
+            self.max_depth = ply
+        if board.final_state() or board.isfull():
+            self.leaves += 1
+
+    def visit(self, ply, over):
+        # node() of the scripts that search a list of squares: plies below the root, is the game over
+        self.nodes += 1
+        if ply > self.max_depth:
+            self.max_depth = ply
+        if over:
+            self.leaves += 1
+
+    def leaf(self):
+        self.leaves += 1
+
+    def cutoff(self, child):
+        self.cutoffs[child] = self.cutoffs.get(child, 0) + 1
+
+    def interior(self, searched):
+        self.branching[searched] = self.branching.get(searched, 0) + 1
+
+    def iteration(self, depth):
+        now = time.perf_counter()
+        self.iterations.append((depth, now - self.mark_time, self.nodes - self.mark_nodes))
+        self.mark_time, self.mark_nodes = now, self.nodes
+
+    def finish(self):
+        self.seconds = time.perf_counter() - self.start_time
+        if self.tt is not None:
+            tt = self.tt
+            self.tt_hits = tt.hits - self.tt_start[0]
+            self.tt_probes = tt.hits + tt.misses + tt.collisions - self.tt_start[1]
+            self.tt = None
+
+    def add(self, counts):
+        # as_dict() of a search in a worker process, between start() and finish()
+        self.nodes += counts['nodes']
+        self.leaves += counts['leaves']
+        self.max_depth = max(self.max_depth, counts['max_depth'])
+        for child, count in counts['cutoffs'].items():
+            self.cutoffs[child] = self.cutoffs.get(child, 0) + count
+        for moves, count in counts['branching'].items():
+            self.branching[moves] = self.branching.get(moves, 0) + count
+        self.tt_probes += counts['tt_probes']
+        self.tt_hits += counts['tt_hits']
+
+    # --- RESULTS ---
+
+    def mean_branching(self):
+        interior = sum(self.branching.values())
+        return sum(moves * nodes for moves, nodes in self.branching.items()) / interior if interior else 0.0
+
+    def first_cutoff_rate(self):
+        cutoffs = sum(self.cutoffs.values())
+        return self.cutoffs.get(0, 0) / cutoffs if cutoffs else 0.0
+
+    def as_dict(self):
+        return {'nodes': self.nodes, 'leaves': self.leaves, 'max_depth': self.max_depth,
+                'cutoffs': dict(sorted(self.cutoffs.items())), 'branching': dict(sorted(self.branching.items())),
+                'iterations': self.iterations, 'tt_probes': self.tt_probes, 'tt_hits': self.tt_hits,
+                'seconds': self.seconds}
+
+    def __str__(self):
+        lines = [f"search nodes: {self.nodes} leaves: {self.leaves} max depth: {self.max_depth} "
+                 f"seconds: {self.seconds:.3f} nodes/s: {self.nodes / self.seconds if self.seconds else 0:.0f}"]
+        if self.tt_probes:
+            lines.append(f"  TT probes: {self.tt_probes} hits: {self.tt_hits} ({self.tt_hits / self.tt_probes:.1%})")
+        if self.cutoffs:
+            by_child = ' '.join(f"{child}:{count}" for child, count in sorted(self.cutoffs.items()))
+            lines.append(f"  cutoffs by move index: {by_child} (first move {self.first_cutoff_rate():.1%})")
+        if self.branching:
+            histogram = ' '.join(f"{moves}:{count}" for moves, count in sorted(self.branching.items()))
+            lines.append(f"  moves searched per node: {histogram} (mean {self.mean_branching():.2f})")
+        for depth, seconds, nodes in self.iterations:
+            lines.append(f"  depth {depth}: {seconds:.4f}s {nodes} nodes")
+        return '\n'.join(lines)
@@ -1,21 +1,28 @@
-
-
-import copy
 import os
-import sys
 # import pygame
 import random
-import numpy as np
-import psutil
 # import time
 from constants import *
+from transposition import TranspositionTable, DEFAULT_BYTES, EXACT, LOWER, UPPER
+import bitboard
+from canonical import get_symmetry, TRANSFORM_IDS
+from ordering import MoveOrdering, FEATURES
+from search import Budget, horizon, iterative_deepening
+from stats import SearchStats
 
 # --- PYGAME SETUP ---
 
-pygame.init()
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('TIC TAC TOE AI')
-screen.fill(BG_COLOR)
+# the window is only made when the game starts, so the AI can be imported without pygame or a display
+pygame = screen = None
+
+
+def init_screen():
+    global pygame, screen
+    import pygame
+    pygame.init()
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('TIC TAC TOE AI')
+    screen.fill(BG_COLOR)
 
 # ----------------Game Instructions-------------------
 # ---------press 'g' to change gamemode (pvp or ai)---------
@@ -26,131 +33,71 @@ screen.fill(BG_COLOR)
 
 # --- CLASSES ---
 
-class Board:
-
-    def __init__(self):
-        self.squares = np.zeros((ROW, COL))
-        self.empty_sqrs = self.squares  # [squares]
-        self.marked_sqrs = 0
-
-    def final_state(self, show=False):
-        # return 0 if no win, return 1 if player 1 is win, return 2 if player 2 is win
-
-        # vertical wins
-        for col in range(COL):
-            if self.squares[0][col] == self.squares[1][col] == self.squares[2][col] != 0:
-                if show:
-                    color = CIR_COLOR if self.squares[0][col] == 2 else CROSS_COLOR
-                    iPos = (col * SQSIZE + SQSIZE // 2, 20)
-                    fPos = (col * SQSIZE + SQSIZE // 2, HEIGHT - 20)
-                    pygame.draw.line(screen, color, iPos, fPos, LINE_WIDTH)
-                return self.squares[0][col]
-
-        # horizontal wins
-        for row in range(ROW):
-            if self.squares[row][0] == self.squares[row][1] == self.squares[row][2] != 0:
-                if show:
-                    color = CIR_COLOR if self.squares[row][0] == 2 else CROSS_COLOR
-                    iPos = (20, row * SQSIZE + SQSIZE // 2)
-                    fPos = (WIDTH - 20, row * SQSIZE + SQSIZE // 2)
-                    pygame.draw.line(screen, color, iPos, fPos, LINE_WIDTH)
-                return self.squares[row][0]
-
-        # desc diagonal
-        if self.squares[0][0] == self.squares[1][1] == self.squares[2][2] != 0:
-            if show:
-                color = CIR_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                iPos = (20, 20)
-                fPos = (WIDTH - 20, HEIGHT - 20)
-                pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-
-        # asc diagonal
-        if self.squares[2][0] == self.squares[1][1] == self.squares[0][2] != 0:
-            if show:
-                color = CIR_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                iPos = (20, HEIGHT - 20)
-                fPos = (WIDTH - 20, 20)
-                pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-
-        # no win yet
-        return 0
-
-    def mark_sqr(self, row, col, player):
-        self.squares[row][col] = player
-        self.marked_sqrs += 1
-
-    def empty_sqr(self, row, col):
-        return self.squares[row][col] == 0
-
-    def get_empty_sqrs(self):
-        empty_sqrs = []
-        for row in range(ROW):
-            for col in range(COL):
-                if self.empty_sqr(row, col):
-                    empty_sqrs.append((row, col))
-
-        return empty_sqrs
-
-    def isfull(self):
-        return self.marked_sqrs == 9
+class Board(bitboard.Board):
 
+    def __init__(self, rows=3, cols=3, k=3):
+        super().__init__(rows, cols, k)
+        self.symmetry = get_symmetry(cols, rows)
 
-    def flipud(self):
-        new_board = self.copy_board()
-        new_board.squares = np.flipud(new_board.squares)
+    def transformed(self, t):
+        # the board moved by symmetry t (see canonical.TRANSFORMS)
+        # replaying the marks keeps the line counts and the hash of the new board right
+        perm = self.symmetry.perms[t]
+        new_board = Board(self.rows, self.cols, self.k)
+        for idx, player in self.stack:
+            new_board.push(*self.sqrs[perm[idx]], player)
         return new_board
 
+    def flipud(self):
+        return self.transformed(TRANSFORM_IDS['flipud'])
+
     def fliplr(self):
-        new_board = self.copy_board()
-        new_board.squares = np.fliplr(new_board.squares)
-        return new_board
+        return self.transformed(TRANSFORM_IDS['fliplr'])
 
     def rot90(self):
-        new_board = self.copy_board()
-        new_board.squares = np.rot90(new_board.squares)
-        return new_board
-
+        return self.transformed(TRANSFORM_IDS['rot90'])
 
     def generate_symmetrical_boards(self):
-        symmetrical_boards = []
-
-        # Original board
-        symmetrical_boards.append(self.copy_board())
-
-        # Horizontal flip
-        symmetrical_boards.append(self.copy_board().flipud())
-
-        # Vertical flip
-        symmetrical_boards.append(self.copy_board().fliplr())
-
-        # Diagonal flip
-        symmetrical_boards.append(self.copy_board().rot90())
+        # every symmetric copy of the board: 4 rotations and 4 reflections (4 copies if not square)
+        return [self.transformed(t) for t in self.symmetry.transforms]
 
-        symmetrical_boards.append(self.copy_board().flipud_fliplr())
-
-        return symmetrical_boards
-
-    def flipud_fliplr(self):
-        new_board = self.copy_board()
-        new_board.squares = np.fliplr(np.flipud(new_board.squares))
-        return new_board
+    def canonical(self):
+        return self.symmetry.canonical(self)
 
     def copy_board(self):
-        new_board = Board()
-        new_board.squares = self.squares.copy()
-        new_board.marked_sqrs = self.marked_sqrs
-        return new_board
+        return self.copy()
 
 class AI:
 
-    def __init__(self, level=1, player=2):
+    def __init__(self, level=1, player=2, tt_bytes=DEFAULT_BYTES, tt_policy='depth', symmetry_moves='root',
+                 ordering=FEATURES, time_limit=None, node_limit=None, stats=False):
         self.level = level
         self.player = player
         self.nodes_expanded = 0
+        self.tt = TranspositionTable(tt_bytes, tt_policy)  # kept between moves, the values do not depend on the root
+        self.ordering = MoveOrdering(ordering)  # which move ordering heuristics to use, see ordering.py
+        self.stats = SearchStats() if stats else None  # stats=True prints what every search did, see stats.py
+        # budget of one move (seconds and/or nodes), None for both searches to the end of the game
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.budget = None
+        # where symmetric moves are skipped: 'root', 'all' (every node) or None
+        self.symmetry_moves = symmetry_moves
+        self.root_marks = 0
+
+    def get_moves(self, board):
+        # symmetric moves lead to the same score, so only one of each group is searched
+        if self.symmetry_moves == 'all' or (self.symmetry_moves == 'root' and board.marked_sqrs == self.root_marks):
+            return self.symmetry.unique_moves(board)
+        return board.get_empty_sqrs()
+
+    # depth: how many moves to look ahead, None to search to the end of the game
+    def minimax_alpha_beta(self, board, maximizing, alpha, beta, depth=None):
+        # every call is one node
+        self.nodes_expanded += 1
+        if self.stats is not None:
+            self.stats.node(board)
 
-    def minimax_alpha_beta(self, board, maximizing, alpha, beta, unique_boards):
         case = board.final_state()
 
         if case == 1:
@@ -162,60 +109,119 @@ class AI:
         elif board.isfull():
             return 0, None
 
-        if board.squares.tobytes() in unique_boards:
-            return 0, None  # Skip expansion if the board is symmetrical and has been processed before
-
-        unique_boards.add(board.squares.tobytes())
+        # transposition table keyed on the canonical position, so all symmetric copies share one entry
+        # the stored move is on the canonical board and is mapped back with the transform t
+        alpha_orig, beta_orig = alpha, beta
+        left = board.cells - board.marked_sqrs
+        if depth is None or depth > left:
+            depth = left
+        if self.budget is not None:
+            self.budget.check(self.nodes_expanded)
+        key, t = self.symmetry.canonical(board)
+        entry = self.tt.probe(key)
+        tt_move = None
+        if entry is not None:
+            tt_eval, flag, tt_depth, tt_move = entry
+            tt_move = self.symmetry.from_canonical(t, tt_move)
+            if tt_depth >= depth:
+                # a bound only ends the search when it is already outside the window
+                if flag == EXACT or (flag == LOWER and tt_eval >= beta) or (flag == UPPER and tt_eval <= alpha):
+                    return tt_eval, tt_move
+
+        # depth limit reached: guess the score from the open lines
+        if depth == 0:
+            if self.stats is not None:
+                self.stats.leaf()
+            return horizon(board), None
 
         if maximizing:
             max_eval = -float('inf')
             best_move = None
-            empty_sqrs = board.get_empty_sqrs()
+            empty_sqrs = self.ordering.order(board, self.get_moves(board), 1, tt_move)
 
-            for (row, col) in empty_sqrs:
-                self.nodes_expanded += 1
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, 1)
-                eval = self.minimax_alpha_beta(temp_board, False, alpha, beta, unique_boards)[0]
+            for child, (row, col) in enumerate(empty_sqrs):
+                board.push(row, col, 1)
+                eval = self.minimax_alpha_beta(board, False, alpha, beta, depth - 1)[0]
+                board.pop()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = (row, col)
                 alpha = max(alpha, eval)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, (row, col), 1, depth, child)
+                    if self.stats is not None:
+                        self.stats.cutoff(child)
                     break
 
-            return max_eval, best_move
+            eval = max_eval
 
         elif not maximizing:
             min_eval = float('inf')
             best_move = None
-            empty_sqrs = board.get_empty_sqrs()
-            self.nodes_expanded += 1
+            empty_sqrs = self.ordering.order(board, self.get_moves(board), self.player, tt_move)
 
-            for (row, col) in empty_sqrs:
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, self.player)
-                eval = self.minimax_alpha_beta(temp_board, True, alpha, beta, unique_boards)[0]
+            for child, (row, col) in enumerate(empty_sqrs):
+                board.push(row, col, self.player)
+                eval = self.minimax_alpha_beta(board, True, alpha, beta, depth - 1)[0]
+                board.pop()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = (row, col)
                 beta = min(beta, eval)
                 if beta <= alpha:
+                    self.ordering.cutoff(board, (row, col), self.player, depth, child)
+                    if self.stats is not None:
+                        self.stats.cutoff(child)
                     break
 
-            return min_eval, best_move
+            eval = min_eval
+
+        if self.stats is not None:
+            self.stats.interior(child + 1)
+
+        # store how far the result can be trusted
+        if eval <= alpha_orig:
+            flag = UPPER
+        elif eval >= beta_orig:
+            flag = LOWER
+        else:
+            flag = EXACT
+        self.tt.store(key, eval, flag, depth, self.symmetry.to_canonical(t, best_move))
+
+        return eval, best_move
 
     def eval(self, main_board):
-        unique_boards = set()  # Set to keep track of unique symmetrical boards
-        eval, move = self.minimax_alpha_beta(main_board, False, -float('inf'), float('inf'), unique_boards)
+        self.symmetry = get_symmetry(main_board.cols, main_board.rows)
+        self.root_marks = main_board.marked_sqrs
+        self.ordering.new_search()
+        if self.stats is not None:
+            self.stats.start(main_board, self.tt)
+        if self.time_limit is None and self.node_limit is None:
+            eval, move = self.minimax_alpha_beta(main_board, False, -float('inf'), float('inf'))
+        else:
+            # iterative deepening, answers with the move of the deepest search that fits in the budget
+            self.budget = Budget(self.time_limit, self.node_limit)
+            self.budget.start(self.nodes_expanded)
+            eval, move, depth = iterative_deepening(
+                lambda depth, alpha, beta: self.minimax_alpha_beta(main_board, False, alpha, beta, depth),
+                main_board, self.budget, stats=self.stats)
+            self.budget = None
+            print(f'searched {depth} moves deep')
+        if self.stats is not None:
+            self.stats.finish()
 
         print(f'AI has chosen to mark the square in pos {move} with an eval of: {eval}')
+        print(self.tt)
+        print(self.ordering)
+        if self.stats is not None:
+            print(self.stats)
         return move
 # Game class
 class Game:
-    def __init__(self):
-        self.board = Board()
-        self.ai = AI()
+    # ai: an AI made by the caller (main.py keeps one per game, so its tables stay warm between games)
+    def __init__(self, ai=None):
+        self.board = Board(ROW, COL, WIN_LEN)
+        self.ai = ai if ai is not None else AI()
         self.player = 1
         self.gamemode = 'ai'
         self.running = True
@@ -236,7 +242,7 @@ class Game:
         return self.board.final_state(show=True) != 0 or self.board.isfull()
 
     def reset(self):
-        self.__init__()
+        self.__init__(self.ai)
 
     def draw_fig(self, row, col):
         if self.player == 1:
@@ -260,17 +266,22 @@ class Game:
         screen.fill(BG_COLOR)
 
         # vertical
-        pygame.draw.line(screen, LINE_COLOR, (SQSIZE, 0), (SQSIZE, HEIGHT), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (WIDTH - SQSIZE, 0), (WIDTH - SQSIZE, HEIGHT), LINE_WIDTH)
+        for col in range(1, COL):
+            pygame.draw.line(screen, LINE_COLOR, (col * SQSIZE, 0), (col * SQSIZE, HEIGHT), LINE_WIDTH)
 
         # horizontal
-        pygame.draw.line(screen, LINE_COLOR, (0, SQSIZE), (WIDTH, SQSIZE), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (0, HEIGHT - SQSIZE), (WIDTH, HEIGHT - SQSIZE), LINE_WIDTH)
+        for row in range(1, ROW):
+            pygame.draw.line(screen, LINE_COLOR, (0, row * SQSIZE), (WIDTH, row * SQSIZE), LINE_WIDTH)
 
 # ... (the rest of your main function code)
 import time
 
-def main():
+# keep_ai: the AI of every game, kept by main.py; closing the window returns so the game can be
+# started again from there
+def main(keep_ai=None):
+    init_screen()
+    import psutil  # only the game window reports the memory of the process
+
     total_nodes_expanded = 0
     total_time_elapsed = 0
     total_memory_used = 0
@@ -279,17 +290,17 @@ def main():
 
     for _ in range(num_rounds):
         # --- OBJECTS ---
-        game = Game()
+        game = Game(keep_ai)
         board = game.board
         ai = game.ai
 
         # --- GAME LOOP ---
-        start_time = time.time()
+        ai_time = 0
         while not game.isover():
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
-                    sys.exit()
+                    return
 
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_g:
@@ -321,7 +332,9 @@ def main():
                             game.running = False
 
             if game.gamemode == 'ai' and game.player == ai.player and game.running:
+                start_time = time.perf_counter()
                 row, col = game.ai.eval(game.board)
+                ai_time += time.perf_counter() - start_time
                 game.make_move(row, col)
 
                 if game.isover():
@@ -330,14 +343,8 @@ def main():
                 print(f"Nodes Expanded: {ai.nodes_expanded}")
 
             pygame.display.update()
-        start_time = time.time()
-
-        # Simulate some time-consuming operations
-        for _ in range(1000000):
-            _ = 2 * 2
-
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+        # time the AI spent choosing its moves this round
+        elapsed_time = ai_time
 
         print(f"Elapsed Time: {elapsed_time} seconds")
         memory_used = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024  # in MB
@@ -371,8 +378,8 @@ def main():
     print(f"Average Memory Used: {avg_memory_used} MB")
 
     pygame.quit()
-    sys.exit()
 
-main()
+if __name__ == "__main__":
+    main()
 
 
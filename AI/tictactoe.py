@@ -1,113 +1,51 @@
-import copy
 import os
 import sys
 import time
-from tkinter import messagebox
 
-import pygame
 import random
-import numpy as np
-import psutil
 from constants import *
+from bitboard import Board
+from search import Budget, horizon, iterative_deepening
+from solved import get_table
+from stats import SearchStats
 
 # --- PYGAME SETUP ---
 
-pygame.init()
-# gam_sound = pygame.mixer.Sound(r"D:\AI Project\tectactoe\mixkit-game-level-music-689.wav")
-screen = pygame.display.set_mode((WIDTH, HEIGHT))
-pygame.display.set_caption('TIC TAC TOE AI MinMax Basic')
-screen.fill(BG_COLOR)
+# the window is only made when the game starts, so the AI can be imported without pygame or a display
+pygame = screen = None
+
+
+def init_screen():
+    global pygame, screen
+    import pygame
+    pygame.init()
+    # gam_sound = pygame.mixer.Sound(r"D:\AI Project\tectactoe\mixkit-game-level-music-689.wav")
+    screen = pygame.display.set_mode((WIDTH, HEIGHT))
+    pygame.display.set_caption('TIC TAC TOE AI MinMax Basic')
+    screen.fill(BG_COLOR)
 
 
              # ----------------Game Instructions-------------------
                    #    ---------press 'g' to change gamemode (pvp or ai)---------
                   # --------- press '0' to change ai level to 0 (random)-----
                     #    ---------press '1' to change ai level to 1 (MINMAX Algorithm)-----
+                    #    ---------press '3' to change ai level to 3 (perfect play from the solved positions file)-----
                     #      -----------press 'r' to restart the game ------
 
 # --- CLASSES ---
 
-class Board:
-
-    def __init__(self):
-        self.squares = np.zeros( (ROW, COL) )
-        self.empty_sqrs = self.squares # [squares]
-        self.marked_sqrs = 0
-
-    def final_state(self, show=False):
-        # return 0 if no win , return 1 if player 1 is win ,return 2 if palyer 2 is win
-
-
-        # vertical wins
-        for col in range(COL):
-            if self.squares[0][col] == self.squares[1][col] == self.squares[2][col] != 0:
-                if show:
-                    color = CIR_COLOR if self.squares[0][col] == 2 else CROSS_COLOR
-                    iPos = (col * SQSIZE + SQSIZE // 2, 20)
-                    fPos = (col * SQSIZE + SQSIZE // 2, HEIGHT - 20)
-                    pygame.draw.line(screen, color, iPos, fPos, LINE_WIDTH)
-                return self.squares[0][col]
-
-        # horizontal wins
-        for row in range(ROW):
-            if self.squares[row][0] == self.squares[row][1] == self.squares[row][2] != 0:
-                if show:
-                    color = CIR_COLOR if self.squares[row][0] == 2 else CROSS_COLOR
-                    iPos = (20, row * SQSIZE + SQSIZE // 2)
-                    fPos = (WIDTH - 20, row * SQSIZE + SQSIZE // 2)
-                    pygame.draw.line(screen, color, iPos, fPos, LINE_WIDTH)
-                return self.squares[row][0]
-
-        # desc diagonal
-        if self.squares[0][0] == self.squares[1][1] == self.squares[2][2] != 0:
-            if show:
-                color = CIR_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                iPos = (20, 20)
-                fPos = (WIDTH - 20, HEIGHT - 20)
-                pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-
-        # asc diagonal
-        if self.squares[2][0] == self.squares[1][1] == self.squares[0][2] != 0:
-            if show:
-                color = CIR_COLOR if self.squares[1][1] == 2 else CROSS_COLOR
-                iPos = (20, HEIGHT - 20)
-                fPos = (WIDTH - 20, 20)
-                pygame.draw.line(screen, color, iPos, fPos, CROSS_WIDTH)
-            return self.squares[1][1]
-
-        # no win yet
-        return 0
-
-    def mark_sqr(self, row, col, player):
-        self.squares[row][col] = player
-        self.marked_sqrs += 1
-
-    def empty_sqr(self, row, col):
-        return self.squares[row][col] == 0
-
-    def get_empty_sqrs(self):
-        empty_sqrs = []
-        for row in range(ROW):
-            for col in range(COL):
-                if self.empty_sqr(row, col):
-                    empty_sqrs.append( (row, col) )
-
-        return empty_sqrs
-
-    def isfull(self):
-        return self.marked_sqrs == 9
-
-    def isempty(self):
-        return self.marked_sqrs == 0
-
 class AI:
 
-    def __init__(self, level=1, player=2):
+    def __init__(self, level=1, player=2, time_limit=None, node_limit=None, stats=False):
         self.level = level
         self.player = player
         self.nodes_expanded = 0
         self.total_nodes_expanded = 0
+        self.stats = SearchStats() if stats else None  # stats=True prints what every search did, see stats.py
+        # budget of one move (seconds and/or nodes), None for both searches to the end of the game
+        self.time_limit = time_limit
+        self.node_limit = node_limit
+        self.budget = None
         # --- RANDOM ---
 
     # this fun responsible of know empty square and choose random index to play in it
@@ -118,12 +56,17 @@ class AI:
         return empty_sqrs[idx] # return empty square in the postion of index (some row and some colums)
 
     # --- MINIMAX ---
+    # adds the nodes of this round to the total and starts counting again
     def reset_expanded_nodes(self):
-        total_expanded =+ self.nodes_expanded
-        # self.total_nodes_expanded = total_expanded  # Update total nodes expanded
+        self.total_nodes_expanded += self.nodes_expanded
         self.nodes_expanded = 0
-        return total_expanded
-    def minimax(self, board, maximizing):
+        return self.total_nodes_expanded
+    # depth: how many moves to look ahead, None to search to the end of the game
+    def minimax(self, board, maximizing, depth=None):
+        # every call is one node
+        self.nodes_expanded += 1
+        if self.stats is not None:
+            self.stats.node(board)
 
         # terminal case
         case = board.final_state()
@@ -140,39 +83,57 @@ class AI:
         elif board.isfull():
             return 0, None
 
+        if self.budget is not None:
+            self.budget.check(self.nodes_expanded)
+
+        # depth limit reached: guess the score from the open lines
+        if depth == 0:
+            if self.stats is not None:
+                self.stats.leaf()
+            return horizon(board), None
+        if depth is not None:
+            depth -= 1
+
         if maximizing:
             max_eval = -100
             best_move = None
             empty_sqrs = board.get_empty_sqrs()
 
             for (row, col) in empty_sqrs:
-                self.nodes_expanded += 1
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, 1)
-                eval = self.minimax(temp_board, False)[0]
+                board.push(row, col, 1)
+                eval = self.minimax(board, False, depth)[0]
+                board.pop()
                 if eval > max_eval:
                     max_eval = eval
                     best_move = (row, col)
 
+            if self.stats is not None:
+                self.stats.interior(len(empty_sqrs))
             return max_eval, best_move
 
         elif not maximizing:
             min_eval = 100
             best_move = None
             empty_sqrs = board.get_empty_sqrs()
-            self.nodes_expanded += 1
 
             for (row, col) in empty_sqrs:
-                temp_board = copy.deepcopy(board)
-                temp_board.mark_sqr(row, col, self.player)
-                eval = self.minimax(temp_board, True)[0]
+                board.push(row, col, self.player)
+                eval = self.minimax(board, True, depth)[0]
+                board.pop()
                 if eval < min_eval:
                     min_eval = eval
                     best_move = (row, col)
 
+            if self.stats is not None:
+                self.stats.interior(len(empty_sqrs))
             return min_eval, best_move
 
 
+    # --- SOLVED POSITIONS ---
+    # the table of this board size (built on first use for 3x3), None if there is none
+    def solved(self, board):
+        return get_table(board.rows, board.cols, board.k)
+
     # --- MAIN FUNCTION OF AI CLASS  ---
     # this function used to determine if we play with random choice or with minmax algorithm
     def eval(self, main_board):
@@ -181,18 +142,44 @@ class AI:
             # random choice
             eval = 'random'
             move = self.rnd(main_board)
+        elif self.level == 3:
+            # perfect play: read the answer from the solved positions file, no search at all
+            table = self.solved(main_board)
+            if table is None:
+                raise ValueError(f"level 3 needs a solved positions file for {main_board.rows}x{main_board.cols} "
+                                 f"k={main_board.k}, make it with retrograde.py")
+            eval, move = table.lookup(main_board)
+            if move is None:
+                # the table has no move for positions no game reaches and for games that are over
+                raise ValueError("the solved positions file has no move for this position, "
+                                 "the game is over or the position cannot come from a game")
         else:
             # minmax algorithm choice
-            eval, move = self.minimax(main_board, False)
+            if self.stats is not None:
+                self.stats.start(main_board)
+            if self.time_limit is None and self.node_limit is None:
+                eval, move = self.minimax(main_board, False)
+            else:
+                # iterative deepening, answers with the move of the deepest search that fits in the budget
+                self.budget = Budget(self.time_limit, self.node_limit)
+                self.budget.start(self.nodes_expanded)
+                eval, move, depth = iterative_deepening(lambda depth, alpha, beta: self.minimax(main_board, False, depth),
+                                                        main_board, self.budget, stats=self.stats)
+                self.budget = None
+                print(f'searched {depth} moves deep')
+            if self.stats is not None:
+                self.stats.finish()
+                print(self.stats)
 
         print(f'AI has chosen to mark the square in pos {move} with an eval of: {eval}')
         return move # row, col
 
 class Game:
 
-    def __init__(self):
-        self.board = Board()
-        self.ai = AI()
+    # ai: an AI made by the caller (main.py keeps one per game, so its tables stay warm between games)
+    def __init__(self, ai=None):
+        self.board = Board(ROW, COL, WIN_LEN)
+        self.ai = ai if ai is not None else AI()
         self.player = 1  #player 1= crosses   # player 2= circles
         self.gamemode = 'ai' # pvp or ai
         self.running = True
@@ -205,7 +192,7 @@ class Game:
 
             total_expanded = self.ai.reset_expanded_nodes()  # Reset and get total expanded nodes
             print(f"Sum of Expanded Nodes: {total_expanded}")  # Print the total expanded nodes
-            self.__init__()
+            self.__init__(self.ai)
 
     def show_lines(self):
         # bg
@@ -213,12 +200,12 @@ class Game:
 
         # verticale
         #  line(surface, color, start_pos, end_pos, width=1) -> Rect
-        pygame.draw.line(screen, LINE_COLOR, (SQSIZE, 0), (SQSIZE, HEIGHT), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (WIDTH - SQSIZE, 0), (WIDTH - SQSIZE, HEIGHT), LINE_WIDTH)
+        for col in range(1, COL):
+            pygame.draw.line(screen, LINE_COLOR, (col * SQSIZE, 0), (col * SQSIZE, HEIGHT), LINE_WIDTH)
 
         # horizontal
-        pygame.draw.line(screen, LINE_COLOR, (0, SQSIZE), (WIDTH, SQSIZE), LINE_WIDTH)
-        pygame.draw.line(screen, LINE_COLOR, (0, HEIGHT - SQSIZE), (WIDTH, HEIGHT - SQSIZE), LINE_WIDTH)
+        for row in range(1, ROW):
+            pygame.draw.line(screen, LINE_COLOR, (0, row * SQSIZE), (WIDTH, row * SQSIZE), LINE_WIDTH)
     def draw_fig(self, row, col):
         if self.player == 1:
             # draw cross
@@ -255,9 +242,13 @@ class Game:
     def reset(self):
         total_expanded = self.ai.reset_expanded_nodes()  # Reset and get total expanded nodes
         print(f"Sum of Expanded Nodes: {total_expanded}")  # Print the total expanded nodes
-        self.__init__()
+        self.__init__(self.ai)
 
-def main():
+# keep_ai: the AI of every game, kept by main.py; closing the window returns so the game can be
+# started again from there
+def main(keep_ai=None):
+    init_screen()
+    import psutil  # only the game window reports the memory of the process
 
     # --- OBJECTS ---
     # tracemalloc.start()
@@ -268,17 +259,17 @@ def main():
 
     for _ in range(num_rounds):
         # --- OBJECTS ---
-        game = Game()
+        game = Game(keep_ai)
         board = game.board
         ai = game.ai
 
         # --- GAME LOOP ---
-        start_time = time.time()
+        ai_time = 0
         while not game.isover():
             for event in pygame.event.get():
                 if event.type == pygame.QUIT:
                     pygame.quit()
-                    sys.exit()
+                    return
 
                 if event.type == pygame.KEYDOWN:
                     if event.key == pygame.K_g:
@@ -298,6 +289,13 @@ def main():
                     if event.key == pygame.K_2:
                         ai.level = 2
 
+                    if event.key == pygame.K_3:
+                        # only with a solved positions file for this board, level 3 does not search
+                        if ai.solved(board) is not None:
+                            ai.level = 3
+                        else:
+                            print(f"no solved positions file for {ROW}x{COL} k={WIN_LEN}, the AI stays at level {ai.level}")
+
                 if event.type == pygame.MOUSEBUTTONDOWN:
                     pos = event.pos
                     row = pos[1] // SQSIZE
@@ -310,7 +308,9 @@ def main():
                             game.running = False
 
             if game.gamemode == 'ai' and game.player == ai.player and game.running:
+                start_time = time.perf_counter()
                 row, col = game.ai.eval(game.board)
+                ai_time += time.perf_counter() - start_time
                 game.make_move(row, col)
 
                 if game.isover():
@@ -319,14 +319,8 @@ def main():
                 print(f"Nodes Expanded: {ai.nodes_expanded}")
 
             pygame.display.update()
-        start_time = time.time()
-
-        # Simulate some time-consuming operations
-        for _ in range(1000000):
-            _ = 2 * 2
-
-        end_time = time.time()
-        elapsed_time = end_time - start_time
+        # time the AI spent choosing its moves this round
+        elapsed_time = ai_time
 
         print(f"Elapsed Time: {elapsed_time} seconds")
         memory_used = psutil.Process(os.getpid()).memory_info().rss / 1024 / 1024  # in MB
@@ -360,10 +354,10 @@ def main():
     print(f"Average Memory Used: {avg_memory_used} MB")
 
     pygame.quit()
-    sys.exit()
 
 
-main()
+if __name__ == "__main__":
+    main()
 
 #     def time_profile_example():
 #         start_time = time.time()
@@ -0,0 +1,180 @@
+# headless tournament between the engines of engines.py, run from the AI folder:
+#   python tournament.py alphabeta random bfs --games 10
+#   python tournament.py pvs mcts --size 4 --k 3 --move-time 0.5 --out results.jsonl
+# every pair of engines plays --games games, the engines change colours every game
+# game n of the tournament is played with the seed --seed + n, so a tournament can be played again
+# the games are played by a pool of worker processes (one per core), every finished game is written
+# to the --out file at once (.jsonl: one JSON object per line, anything else: CSV)
+# at the end a table with the wins, draws, losses and nodes per second of every engine is printed
+
+import argparse
+import csv
+import itertools
+import json
+import os
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from bitboard import Board
+from engines import ENGINES, make_engine
+
+FIELDS = ['game', 'seed', 'x', 'o', 'winner', 'moves', 'x_nodes', 'o_nodes', 'x_seconds', 'o_seconds']
+
+
+# --- WORKER PROCESS ---
+
+def init_worker(quiet):
+    if quiet:
+        # the engines print every move
+        sys.stdout = open(os.devnull, 'w')
+
+
+def play_game(game, seed, x, o, rows, cols, k, move_time, node_limit):
+    # one game, x plays player 1; returns the row of the results file
+    random.seed(seed)
+    np.random.seed(seed % (1 << 32))
+    board = Board(rows, cols, k)
+    names = {1: x, 2: o}
+    engines = {1: make_engine(x, board, seed, move_time, node_limit),
+               2: make_engine(o, board, seed + 1, move_time, node_limit)}
+    seconds = {1: 0.0, 2: 0.0}
+
+    player = 1
+    while not board.final_state() and not board.isfull():
+        start = time.perf_counter()
+        row, col = engines[player].move(board)
+        seconds[player] += time.perf_counter() - start
+        if not board.empty_sqr(row, col):
+            raise ValueError(f"{names[player]} played the marked square {(row, col)} in game {game}")
+        board.push(row, col, player)
+        player = player % 2 + 1
+
+    winner = board.final_state()
+    return {'game': game, 'seed': seed, 'x': x, 'o': o, 'winner': {0: 'draw', 1: 'x', 2: 'o'}[winner],
+            'moves': board.marked_sqrs, 'x_nodes': engines[1].nodes, 'o_nodes': engines[2].nodes,
+            'x_seconds': round(seconds[1], 6), 'o_seconds': round(seconds[2], 6)}
+
+
+# --- RESULTS ---
+
+class Standing:
+
+    def __init__(self, name):
+        self.name = name
+        self.wins = 0
+        self.draws = 0
+        self.losses = 0
+        self.nodes = 0
+        self.seconds = 0.0
+
+    def games(self):
+        return self.wins + self.draws + self.losses
+
+    def score(self):
+        return (self.wins + self.draws / 2) / self.games() if self.games() else 0.0
+
+    def nodes_per_second(self):
+        return self.nodes / self.seconds if self.seconds else 0.0
+
+
+def add_result(standings, result, entries):
+    # winner is the side that won ('x' or 'o') or 'draw'
+    # entries: side -> the standing's key of the engine that played it
+    for side in ('x', 'o'):
+        standing = standings[entries[side]]
+        standing.nodes += result[f'{side}_nodes']
+        standing.seconds += result[f'{side}_seconds']
+        if result['winner'] == 'draw':
+            standing.draws += 1
+        elif result['winner'] == side:
+            standing.wins += 1
+        else:
+            standing.losses += 1
+
+
+def print_table(standings):
+    print(f"{'engine':>10} {'games':>6} {'wins':>5} {'draws':>5} {'losses':>6} {'score':>7} "
+          f"{'nodes':>12} {'seconds':>9} {'nodes/s':>11}")
+    for standing in sorted(standings.values(), key=lambda standing: -standing.score()):
+        print(f"{standing.name:>10} {standing.games():6} {standing.wins:5} {standing.draws:5} {standing.losses:6} "
+              f"{standing.score():7.1%} {standing.nodes:12} {standing.seconds:9.2f} "
+              f"{standing.nodes_per_second():11.0f}")
+
+
+def open_writer(path):
+    # write(result) for every finished game, the file is flushed so it can be followed while it runs
+    out = open(path, 'w', newline='')
+    if path.endswith('.jsonl'):
+        def write(result):
+            out.write(json.dumps(result) + '\n')
+            out.flush()
+    else:
+        writer = csv.DictWriter(out, FIELDS)
+        writer.writeheader()
+
+        def write(result):
+            writer.writerow(result)
+            out.flush()
+    return out, write
+
+
+def main():
+    parser = argparse.ArgumentParser(description='play every pair of engines against each other without a window')
+    parser.add_argument('engines', nargs='+', choices=list(ENGINES), metavar='engine',
+                        help=f"engines to play: {', '.join(ENGINES)}")
+    parser.add_argument('--games', type=int, default=10, help='games of every pair, the colours alternate')
+    parser.add_argument('--size', type=int, default=3)
+    parser.add_argument('--k', type=int, default=3)
+    parser.add_argument('--move-time', type=float, default=None,
+                        help='seconds per move of the searching engines (default: search to the end)')
+    parser.add_argument('--node-limit', type=int, default=None,
+                        help='nodes per move of the searching engines, random games for mcts')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=None, help='worker processes (default: one per core)')
+    parser.add_argument('--out', default='tournament.csv', help='results file, .jsonl or .csv')
+    parser.add_argument('--verbose', action='store_true', help='keep the output of the engines')
+    args = parser.parse_args()
+
+    shape = (args.size, args.size, args.k)
+    for name in args.engines:
+        sizes = ENGINES[name].sizes
+        if sizes is not None and shape not in sizes:
+            parser.error(f"{name} only plays {sizes}")
+
+    # an engine named twice plays itself, every place in the list has its own standing (pvs, pvs#2)
+    entries = [name if args.engines[:i].count(name) == 0 else f"{name}#{args.engines[:i].count(name) + 1}"
+               for i, name in enumerate(args.engines)]
+
+    # every pair once, then the games of the pair
+    games = []
+    sides = []  # game -> {'x': entry, 'o': entry}
+    for a, b in itertools.combinations(zip(args.engines, entries), 2):
+        for i in range(args.games):
+            x, o = (a, b) if i % 2 == 0 else (b, a)
+            games.append((len(games), args.seed + len(games), x[0], o[0]))
+            sides.append({'x': x[1], 'o': o[1]})
+
+    standings = {entry: Standing(entry) for entry in entries}
+    out, write = open_writer(args.out)
+    start = time.perf_counter()
+    with ProcessPoolExecutor(args.workers, initializer=init_worker, initargs=(not args.verbose,)) as pool:
+        futures = [pool.submit(play_game, *game, args.size, args.size, args.k, args.move_time,
+                               args.node_limit) for game in games]
+        for done, future in enumerate(as_completed(futures), start=1):
+            result = future.result()
+            write(result)
+            add_result(standings, result, sides[result['game']])
+            print(f"\r{done}/{len(games)} games", end='', flush=True)
+    out.close()
+
+    print(f"\r{len(games)} games in {time.perf_counter() - start:.1f}s on a {args.size}x{args.size} board "
+          f"(k={args.k}), results in {args.out}")
+    print_table(standings)
+
+
+if __name__ == "__main__":
+    main()
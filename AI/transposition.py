@@ -0,0 +1,77 @@
+# transposition table for the alpha-beta searches
+# a fixed number of slots (from a memory cap), each slot holds one position:
+#   key -> (value, flag, depth, move)
+# flag tells if value is the exact score or only a bound from an alpha-beta cutoff
+# depth is how many moves deep the stored search went, a shallower search can not be trusted
+
+EXACT = 0
+LOWER = 1  # value is a lower bound (the search failed high, beta cutoff)
+UPPER = 2  # value is an upper bound (the search failed low, no move beat alpha)
+
+DEFAULT_BYTES = 16 * 1024 * 1024
+ENTRY_BYTES = 176  # rough size of one filled slot: key int + entry tuple + two list pointers
+MIN_SLOTS = 1024
+
+_GOLDEN = 0x9E3779B97F4A7C15  # fibonacci hashing spreads keys that are not random (like canonical keys)
+_MASK64 = (1 << 64) - 1
+
+
+class TranspositionTable:
+
+    def __init__(self, max_bytes=DEFAULT_BYTES, policy='depth'):
+        if policy not in ('depth', 'always'):
+            raise ValueError(f"unknown replacement policy {policy!r} (use 'depth' or 'always')")
+
+        # number of slots is the largest power of two under the memory cap
+        bits = max((max_bytes // ENTRY_BYTES).bit_length() - 1, MIN_SLOTS.bit_length() - 1)
+        self.bits = bits
+        self.size = 1 << bits
+        self.policy = policy
+        self.keys = [None] * self.size
+        self.entries = [None] * self.size
+
+        # --- COUNTERS ---
+        self.hits = 0  # slot held this position
+        self.misses = 0  # slot was empty
+        self.collisions = 0  # slot held another position
+        self.stores = 0
+        self.replaced = 0  # stores that threw out another position
+
+    def index(self, key):
+        return ((key * _GOLDEN) & _MASK64) >> (64 - self.bits)
+
+    def probe(self, key):
+        i = self.index(key)
+        stored = self.keys[i]
+        if stored == key:
+            self.hits += 1
+            return self.entries[i]
+        if stored is None:
+            self.misses += 1
+        else:
+            self.collisions += 1
+        return None
+
+    def store(self, key, value, flag, depth, move):
+        i = self.index(key)
+        stored = self.keys[i]
+        if stored is not None and stored != key:
+            # depth-preferred: keep the old position if it was searched deeper
+            if self.policy == 'depth' and self.entries[i][2] > depth:
+                return
+            self.replaced += 1
+        self.keys[i] = key
+        self.entries[i] = (value, flag, depth, move)
+        self.stores += 1
+
+    def clear(self):
+        self.keys = [None] * self.size
+        self.entries = [None] * self.size
+
+    def hit_rate(self):
+        probes = self.hits + self.misses + self.collisions
+        return self.hits / probes if probes else 0.0
+
+    def __str__(self):
+        return (f"TT hits: {self.hits} misses: {self.misses} collisions: {self.collisions} "
+                f"stores: {self.stores} replaced: {self.replaced} hit rate: {self.hit_rate():.1%}")
@@ -0,0 +1,18 @@
+# zobrist keys: one random 64-bit number per (player, square) plus one for the side to move
+# the hash of a position is the XOR of the keys of its marks, so a move updates it with one XOR
+# the seed is fixed so every process (and every run) gets the same keys for the same board size
+
+import random
+from functools import lru_cache
+
+SEED = 0x7107AC70E
+
+
+@lru_cache(maxsize=None)
+def zobrist_keys(cells):
+    rng = random.Random(SEED + cells)
+    keys = [None]  # keys[player][idx], keys[0] unused like the board masks
+    for _ in (1, 2):
+        keys.append(tuple(rng.getrandbits(64) for _ in range(cells)))
+    side = rng.getrandbits(64)  # toggled on every move so the player to move is part of the hash
+    return keys, side